@@ -30,7 +30,7 @@ import path from 'path';
 import { PNG } from 'pngjs';
 
 import { printAudit } from './audit';
-import { Config, saveConfiguration } from './configuration';
+import { Config, imageSizeForHardware, saveConfiguration } from './configuration';
 import {
   candidateImage,
   clearReferencePointer,
@@ -136,7 +136,9 @@ function handleApi(req: express.Request, res: express.Response) {
         server. The body of message must contain a 'runnerID', 'hardware', 'group',
         'name', 'timestamp', 'timing', and 'commitHash'. The 'runnerID' must be one of the
         allowed runners setup for this server. Furthermore, there needs to be the
-        candidate file as a multipart encoded file`
+        candidate file as a multipart encoded file. If the 'hardware' ends in the name of
+        a configured tier, the image must have the tier's size. The API returns the
+        'pixelError' of the candidate compared to the reference image.`
     },
     {
       path: '/api/run-test',
@@ -461,9 +463,10 @@ async function handleSubmitTest(req: express.Request, res: express.Response) {
 
   try {
     const png = PNG.sync.read(file.buffer);
-    if (png.width != Config.size.width || png.height != Config.size.height) {
-      const w = Config.size.width;
-      const h = Config.size.height;
+    const size = imageSizeForHardware(hardware);
+    if (png.width != size.width || png.height != size.height) {
+      const w = size.width;
+      const h = size.height;
       res.status(400).json({ error: `Image has the wrong size. Expected (${w}, ${h})` });
       return;
     }
@@ -552,7 +555,7 @@ async function handleSubmitTest(req: express.Request, res: express.Response) {
 
   saveTestData(testData, testDataPath(group, name, hardware, timeStamp));
   addTestData(group, name, hardware, testData);
-  res.status(200).end();
+  res.status(200).json({ pixelError: nPixels });
 }
 
 /**
@@ -595,9 +598,10 @@ function handleRunTest(req: express.Request, res: express.Response) {
 
   try {
     const png = PNG.sync.read(req.file.buffer);
-    if (png.width != Config.size.width || png.height != Config.size.height) {
-      const w = Config.size.width;
-      const h = Config.size.height;
+    const size = imageSizeForHardware(hardware);
+    if (png.width != size.width || png.height != size.height) {
+      const w = size.width;
+      const h = size.height;
       res.status(400).json({ error: `Image has the wrong size. Expected (${w}, ${h})` });
       return;
     }
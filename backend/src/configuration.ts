@@ -37,6 +37,12 @@ const ConfigurationSchema = z
     }),
     comparisonThreshold: z.number().min(0).max(1),
     imageSize: z.object({ width: z.number().min(1), height: z.number().min(1) }),
+    tierImageSizes: z
+      .record(
+        z.string().min(1),
+        z.object({ width: z.number().min(1), height: z.number().min(1) })
+      )
+      .optional(),
     thumbnailScale: z.number().min(1),
     adminToken: z.string().min(1),
     data: z.string().min(1),
@@ -60,6 +66,7 @@ class Configuration {
     this.slackChannel = config.slack.channel;
     this.comparisonThreshold = config.comparisonThreshold;
     this.size = config.imageSize;
+    this.tierSizes = config.tierImageSizes ?? {};
     this.thumbnailScale = config.thumbnailScale;
     this.adminToken = config.adminToken;
     this.data = config.data;
@@ -85,6 +92,16 @@ class Configuration {
     height: number;
   };
 
+  /// The image sizes for test tiers that are rendered at a different resolution. The key
+  /// is the tier name that is appended to the hardware string, for example a hardware of
+  /// "windows-nvidia-smoke" uses the size of the "smoke" tier
+  tierSizes: {
+    [tier: string]: {
+      width: number;
+      height: number;
+    };
+  };
+
   /// The scaling factor by which the image is reduced to produce a thumbnail
   thumbnailScale: number;
 
@@ -124,6 +141,7 @@ export function saveConfiguration() {
     },
     comparisonThreshold: Config.comparisonThreshold,
     imageSize: Config.size,
+    tierImageSizes: Config.tierSizes,
     thumbnailScale: Config.thumbnailScale,
     adminToken: Config.adminToken,
     data: Config.data,
@@ -132,6 +150,26 @@ export function saveConfiguration() {
   fs.writeFileSync(Config.path, JSON.stringify(config, null, 2));
 }
 
+/**
+ * Returns the image size that images submitted for the provided `hardware` must have. If
+ * the hardware ends in the name of one of the configured tiers, the tier's image size is
+ * used, otherwise the default image size is returned.
+ *
+ * @param hardware The hardware string for which to return the image size
+ * @returns The image size that images for the `hardware` must have
+ */
+export function imageSizeForHardware(hardware: string): {
+  width: number;
+  height: number;
+} {
+  for (const [tier, size] of Object.entries(Config.tierSizes)) {
+    if (hardware.endsWith(`-${tier}`)) {
+      return size;
+    }
+  }
+  return Config.size;
+}
+
 /**
  * The global configuration object that stores general configuration option that are used
  * in various places throughout the server.
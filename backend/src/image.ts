@@ -54,18 +54,16 @@ export function generateComparisonImage(
 
   printAudit(`Creating comparison: "${reference}" & "${candidate}"`);
 
+  // The image sizes are validated when the images are submitted, but images of different
+  // tiers have different sizes and can not be compared with each other
   const refImg = PNG.sync.read(fs.readFileSync(reference));
-  if (refImg.width != Config.size.width || refImg.height != Config.size.height) {
-    return null;
-  }
-
   const testImg = PNG.sync.read(fs.readFileSync(candidate));
-  if (testImg.width != Config.size.width || testImg.height != Config.size.height) {
+  if (refImg.width != testImg.width || refImg.height != testImg.height) {
     return null;
   }
 
-  const { width } = Config.size;
-  const { height } = Config.size;
+  const { width } = refImg;
+  const { height } = refImg;
   const diffImg = new PNG({ width, height });
   const nPixels = pixelmatch(refImg.data, testImg.data, diffImg.data, width, height, {
     threshold: Config.comparisonThreshold
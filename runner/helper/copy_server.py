@@ -1,10 +1,17 @@
 # This script will take the existing results from one server and submit them as new test
 # results to a second server. This can be used to migrate existing test results between
-# updates
+# updates. Instead of copying directly between two servers, the results of the source
+# server can also be exported into a result bundle, which can later be imported into the
+# destination server
 
 import argparse
-import json
+import os
 import requests
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from testsuite.bundle import BundleWriter, read_bundle, submit_results
+from testsuite.ratecontrol import SubmissionController
 
 parser = argparse.ArgumentParser()
 parser.add_argument(
@@ -12,14 +19,14 @@ parser.add_argument(
   dest="source",
   type=str,
   help="The URL of the server from which to copy the results",
-  required=True
+  required=False
 )
 parser.add_argument(
   "-d", "--destination",
   dest="destination",
   type=str,
   help="The URL of the server to which to copy the results",
-  required=True
+  required=False
 )
 parser.add_argument(
   "-r", "--runner",
@@ -27,62 +34,110 @@ parser.add_argument(
   type=str,
   help="A valid runner ID for the destination server to be allowed to submit the "
     "existing test records as new tests",
-  required=True
+  required=False
+)
+parser.add_argument(
+  "-e", "--export",
+  dest="export",
+  type=str,
+  help="Instead of submitting the results of the source server to a destination "
+    "server, write them into the bundle at this path",
+  required=False
+)
+parser.add_argument(
+  "-i", "--import",
+  dest="import_",
+  type=str,
+  help="Instead of downloading the results from a source server, submit the results "
+    "from the bundle at this path to the destination server",
+  required=False
+)
+parser.add_argument(
+  "-w", "--workers",
+  dest="workers",
+  type=int,
+  help="The maximum number of concurrent requests to the destination server. The actual "
+    "number is adapted to how quickly the server responds",
+  default=4
 )
 args = parser.parse_args()
 
+if (args.source is None) == (args.import_ is None):
+  parser.error("Exactly one of --source or --import has to be provided")
+if args.export is None and (args.destination is None or args.runner is None):
+  parser.error("--destination and --runner are required unless using --export")
+
 
-# Request the records from the source server
-res = requests.get(f"{args.source}/api/test-records")
-if res.status_code != 200:
-  print(f"Image submission failed with error {res.status_code}")
-  print(res.text)
-  exit(-1)
-records = json.loads(res.text)
-
-# and then resubmit it as a new test to the destination server
-for record in records:
-  group = record["group"]
-  name = record["name"]
-  hardware = record["hardware"]
-  print(f"Processing {group}/{name}/{hardware}")
-
-  i = 0
-  for data in record["data"]:
-    timestamp = data["timeStamp"]
-    image_url = f"{args.source}/api/result/candidate/{group}/{name}/{hardware}/{timestamp}"
-    log_url = f"{args.source}/api/result/log/{group}/{name}/{hardware}/{timestamp}"
-    print(f"  {i}")
-
-    print(f"    Downloading image: {image_url}")
-    img = requests.get(image_url)
-    if img.status_code != 200:
-      print(f"Error with {res.status_code}")
-      exit(-1)
-
-    print(f"    Downloading log: {log_url}")
-    log = requests.get(log_url)
-    if log.status_code != 200:
-      print(f"Error with {res.status_code}")
-      exit(-1)
-
-
-    print("    Submitting")
-    res = requests.post(
-      f"{args.destination}/api/submit-test",
-      data = {
+
+def download_results(source):
+  """
+  Downloads all test results from the `source` server one at a time and yields a tuple of
+  the record, the log, and the image for each of them
+  """
+  # Request the records from the source server
+  res = requests.get(f"{source}/api/test-records")
+  if res.status_code != 200:
+    print(f"Requesting test records failed with error {res.status_code}")
+    print(res.text)
+    exit(-1)
+  records = res.json()
+
+  session = requests.Session()
+  for record in records:
+    group = record["group"]
+    name = record["name"]
+    hardware = record["hardware"]
+    print(f"Processing {group}/{name}/{hardware}")
+
+    for i, data in enumerate(record["data"]):
+      timestamp = data["timeStamp"]
+      image_url = f"{source}/api/result/candidate/{group}/{name}/{hardware}/{timestamp}"
+      log_url = f"{source}/api/result/log/{group}/{name}/{hardware}/{timestamp}"
+      print(f"  {i}")
+
+      print(f"    Downloading image: {image_url}")
+      img = session.get(image_url)
+      if img.status_code != 200:
+        print(f"Error with {img.status_code}")
+        exit(-1)
+
+      print(f"    Downloading log: {log_url}")
+      log = session.get(log_url)
+      if log.status_code != 200:
+        print(f"Error with {log.status_code}")
+        exit(-1)
+
+      result = {
         "group": group,
         "name": name,
         "hardware": hardware,
-        "runnerID": args.runner,
         "timestamp": timestamp,
         "timing": data["timing"],
         "commitHash": data["commitHash"]
-      },
-      files = {
-        "file": img.content,
-        "log": log.content
       }
-    )
+      yield result, log.content, img.content
+  session.close()
+
+
+
+if args.import_ is not None:
+  results = read_bundle(args.import_)
+else:
+  results = download_results(args.source)
 
-    i = i + 1
+if args.export is not None:
+  with BundleWriter(args.export) as bundle:
+    for record, log, image in results:
+      bundle.add(record, log, image)
+  print(f"Exported {len(bundle.manifest)} results to {args.export}")
+else:
+  controller = SubmissionController(max_concurrency=args.workers)
+  success, failure = submit_results(
+    results,
+    args.destination,
+    args.runner,
+    args.workers,
+    controller
+  )
+  print(f"Copied {success} results, {failure} failed")
+  controller.print_statistics()
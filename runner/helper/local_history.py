@@ -0,0 +1,81 @@
+# This script can be used to inspect and clean up the local history of test results that
+# the runner keeps if no regression server is configured
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from testsuite.history import ResultHistory
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+  "-p", "--path",
+  dest="path",
+  type=str,
+  help="The folder in which the local history is stored",
+  default="history"
+)
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+list_parser = subparsers.add_parser("list", help="Lists the stored images")
+list_parser.add_argument(
+  "-g", "--group",
+  dest="group",
+  type=str,
+  help="Only list the images of tests in this group"
+)
+list_parser.add_argument(
+  "-n", "--name",
+  dest="name",
+  type=str,
+  help="Only list the images of tests with this name"
+)
+list_parser.add_argument(
+  "-t", "--tier",
+  dest="tier",
+  type=str,
+  help="Only list the images of this resolution tier"
+)
+list_parser.add_argument(
+  "-c", "--commit",
+  dest="commit",
+  type=str,
+  help="Only list the images that were created by a commit starting with this hash"
+)
+list_parser.add_argument(
+  "-l", "--last",
+  dest="last",
+  type=int,
+  help="Only list the latest number of images for each test"
+)
+
+gc_parser = subparsers.add_parser(
+  "gc",
+  help="Removes old entries and all images that are no longer referenced"
+)
+gc_parser.add_argument(
+  "-k", "--keep",
+  dest="keep",
+  type=int,
+  help="The number of latest images to keep for each test"
+)
+gc_parser.add_argument(
+  "-a", "--max-age",
+  dest="max_age",
+  type=float,
+  help="Remove all images older than this number of days, except the latest of a test"
+)
+args = parser.parse_args()
+
+history = ResultHistory(args.path)
+if args.command == "list":
+  entries = history.query(args.group, args.name, args.tier, args.commit, args.last)
+  for entry in entries:
+    print(
+      f"{entry['timestamp']}  {entry['group']}/{entry['name']} ({entry['tier']})  "
+      f"{entry['commit']}  {history.blob_path(entry['hash'])}"
+    )
+else:
+  entries, blobs = history.collect_garbage(args.keep, args.max_age)
+  print(f"Removed {entries} entries and {blobs} images")
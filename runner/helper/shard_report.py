@@ -0,0 +1,119 @@
+# This script reports how the tests would be split between runner machines using the
+# runner's `--shard` argument and how long each of the machines is expected to take
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from testsuite.constants import test_base_dir
+from testsuite.journal import Journal
+from testsuite.shard import (
+  expected_duration, journal_durations, known_durations, parse_cutoff, partition,
+  read_durations, server_durations, write_durations
+)
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+  "-d", "--dir",
+  dest="dir",
+  type=str,
+  help="The OpenSpace directory which contains the tests",
+  required=True
+)
+parser.add_argument(
+  "-n", "--shards",
+  dest="shards",
+  type=int,
+  help="The number of shards into which the tests are split",
+  required=True
+)
+parser.add_argument(
+  "-s", "--server",
+  dest="server",
+  type=str,
+  help="The URL of the regression server from which to take the test durations",
+  required=False
+)
+parser.add_argument(
+  "-w", "--hardware",
+  dest="hardware",
+  type=str,
+  help="The hardware for which to take the test durations from the regression server",
+  required=False
+)
+parser.add_argument(
+  "-j", "--journal",
+  dest="journal",
+  type=str,
+  help="The runner journal from which to take the test durations if no server is used",
+  default="journal.jsonl"
+)
+parser.add_argument(
+  "--durations",
+  dest="durations",
+  type=str,
+  help="A file from which to take the test durations instead of a server or journal",
+  required=False
+)
+parser.add_argument(
+  "-c", "--cutoff",
+  dest="cutoff",
+  type=str,
+  help="Only uses durations that were recorded before this point in time (in ISO 8601 "
+    "format), in the same way as the runner's --shard-cutoff",
+  required=False
+)
+parser.add_argument(
+  "-o", "--output",
+  dest="output",
+  type=str,
+  help="Writes the durations into this file, which can be passed to all machines using "
+    "the runner's --shard-durations argument",
+  required=False
+)
+parser.add_argument(
+  "-v", "--verbose",
+  dest="verbose",
+  help="Lists the tests of each shard",
+  action="store_true",
+  default=False
+)
+args = parser.parse_args()
+
+cutoff = parse_cutoff(args.cutoff)
+if args.durations is not None:
+  durations = read_durations(args.durations)
+elif args.server is not None:
+  if args.hardware is None:
+    parser.error("--hardware is required when using --server")
+  durations = server_durations(args.server, args.hardware, cutoff)
+else:
+  durations = journal_durations(Journal(args.journal), cutoff)
+
+if args.output is not None:
+  write_durations(args.output, durations)
+  print(f"Wrote {len(durations)} durations to '{args.output}'")
+
+files = glob.glob(f"{args.dir}/{test_base_dir}/**/*.ostest", recursive=True)
+paths = [ file.replace(os.sep, "/") for file in files ]
+
+known = known_durations(paths, durations)
+default = statistics.median(known) if len(known) > 0 else 0.0
+print(f"{len(paths)} tests, {len(known)} with a recorded duration")
+total = expected_duration(paths, durations, default)
+print(f"Expected time on a single machine: {total:.0f} s")
+
+shards = partition(paths, args.shards, durations)
+for i, shard in enumerate(shards):
+  time = expected_duration(shard, durations, default)
+  print(f"Shard {i + 1}/{args.shards}: {len(shard)} tests, expected {time:.0f} s")
+  if args.verbose:
+    for path in shard:
+      print(f"  {path}")
+
+longest = max(expected_duration(shard, durations, default) for shard in shards)
+if longest > 0:
+  print(f"Expected wall time: {longest:.0f} s (speedup {total / longest:.2f}x)")
@@ -0,0 +1,58 @@
+# This script submits all of the results that are contained in a result bundle to a
+# server. A bundle can be created by the runner using the `--bundle` argument, for example
+# on a machine that does not have access to the server, or exported from an existing
+# server using the `copy_server.py` script
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from testsuite.bundle import read_bundle, submit_results
+from testsuite.ratecontrol import SubmissionController
+
+parser = argparse.ArgumentParser()
+parser.add_argument(
+  "-b", "--bundle",
+  dest="bundle",
+  type=str,
+  help="The path to the bundle whose results should be submitted",
+  required=True
+)
+parser.add_argument(
+  "-d", "--destination",
+  dest="destination",
+  type=str,
+  help="The URL of the server to which to submit the results",
+  required=True
+)
+parser.add_argument(
+  "-r", "--runner",
+  dest="runner",
+  type=str,
+  help="A valid runner ID for the destination server to be allowed to submit the "
+    "results as new tests",
+  required=True
+)
+parser.add_argument(
+  "-w", "--workers",
+  dest="workers",
+  type=int,
+  help="The maximum number of concurrent submissions to the destination server. The "
+    "actual number is adapted to how quickly the server responds",
+  default=4
+)
+args = parser.parse_args()
+
+controller = SubmissionController(max_concurrency=args.workers)
+success, failure = submit_results(
+  read_bundle(args.bundle),
+  args.destination,
+  args.runner,
+  args.workers,
+  controller
+)
+print(f"Submitted {success} results, {failure} failed")
+controller.print_statistics()
+if failure > 0:
+  exit(-1)
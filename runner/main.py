@@ -30,9 +30,20 @@ import os
 import requests
 import shutil
 import time
+from testsuite.benchmark import benchmark_startup
+from testsuite.bundle import BundleWriter
 from testsuite.constants import test_base_dir
-from testsuite.openspace import write_configuration_overwrite, run_single_test, run_single_test_attached
-from testsuite.test import TestResult
+from testsuite.history import ResultHistory
+from testsuite.instruction import SettleOptions
+from testsuite.journal import Journal
+from testsuite.openspace import write_configuration_overwrite, run_single_test_attached
+from testsuite.orchestrator import Orchestrator, Overlap_Policies
+from testsuite.ratecontrol import SubmissionController
+from testsuite.shard import (
+  parse_cutoff, parse_shard, partition, read_durations, server_durations
+)
+from testsuite.test import Test, TestResult, test_identifier
+from testsuite.tiers import Tiers, hardware_for_tier, window_configuration
 
 
 
@@ -42,49 +53,169 @@ from testsuite.test import TestResult
 #       to the finished loading event instead
 
 def submit_image(result: TestResult, hardware: str, timestamp: str, file: str,
-                 runner: str, url: str):
+                 runner: str, url: str, controller: SubmissionController):
   """
-  Submits a new candidate image to the provided URL. This function logs a method
-  indicating whether the image submission succeeded
+  Submits a new candidate image to the provided URL. The submission is retried and
+  throttled by the `controller` if the server is overloaded. This function logs a method
+  indicating whether the image submission succeeded. It returns whether the submission
+  succeeded and the pixel error that the server reported for the image, if any
   """
-  with open(file, "rb") as f:
-    res = requests.post(
-      url,
-      data = {
-        "group": result.group,
-        "name": result.name,
-        "hardware": hardware,
-        "runnerID": runner,
-        "timestamp": timestamp,
-        "timing": result.timing,
-        "commitHash": result.commit
-      },
-      files = {
-        "file": f,
-        "log": result.error
-      }
-    )
+  def send():
+    with open(file, "rb") as f:
+      return requests.post(
+        url,
+        data = {
+          "group": result.group,
+          "name": result.name,
+          "hardware": hardware,
+          "runnerID": runner,
+          "timestamp": timestamp,
+          "timing": result.timing,
+          "commitHash": result.commit
+        },
+        files = {
+          "file": f,
+          "log": result.error
+        },
+        timeout = controller.timeout
+      )
+
+  try:
+    res = controller.request(send)
+  except requests.RequestException as e:
+    print(f"Image submission failed with error {e}")
+    return False, None
+
   if res.status_code == 200:
     print("Image submitted successfully")
     print(f"  Group: {result.group}")
     print(f"  Name: {result.name}")
     print(f"  Hardware: {hardware}")
+    # Older servers do not report the pixel error
+    pixel_error = res.json().get("pixelError") if res.text != "" else None
+    return True, pixel_error
   else:
     print(f"Image submission failed with error {res.status_code}")
     print(res.text)
+    return False, None
 
 
 
-def store_image(result: TestResult, file: str):
+def store_image(result: TestResult, file: str, tier: str, timestamp: str,
+                history: ResultHistory):
   """
-  Stores the images of the provided `TestResult` locally by creating the necessary folders
-  if they don't exist and then saving the image. Only the latest test result are stored.
+  Stores the images of the provided `TestResult` locally in the `history` and makes the
+  latest image available by creating the necessary folders if they don't exist and then
+  linking the image. Images of tiers other than the release tier are stored in a separate
+  folder.
   """
-  dest_folder = f"tests/{result.group}"
+  blob = history.add(
+    result.group,
+    result.name,
+    tier,
+    timestamp,
+    result.commit,
+    result.timing,
+    file
+  )
+
+  base_folder = "tests" if tier == "release" else f"tests-{tier}"
+  dest_folder = f"{base_folder}/{result.group}"
   os.makedirs(dest_folder, exist_ok=True)
   destination = f"{dest_folder}/{result.name}.png"
-  print(f"Copying file {file} -> {destination}")
-  shutil.copy(file, destination)
+  print(f"Storing file {file} -> {destination}")
+  if os.path.exists(destination):
+    os.remove(destination)
+  try:
+    os.link(blob, destination)
+  except OSError:
+    # Hard links are not supported on all file systems
+    shutil.copy(blob, destination)
+
+
+
+def report_result(path: str, timestamp: str, result: TestResult, error: Exception,
+                  journal: Journal, config, bundle: BundleWriter, tier: str,
+                  threshold: float, history: ResultHistory,
+                  controller: SubmissionController) -> bool:
+  """
+  Submits or stores the images of the `result` of the test at `path` depending on whether
+  a `config` was provided. Images that are stored locally are added to the `history`. If
+  a `bundle` is provided, the results are written into the bundle instead. If the test
+  failed, `error` is the exception that caused the failure. The results are submitted
+  under the hardware of the `tier` and throttled by the `controller`. The outcome of the
+  test is recorded in the `journal`. This function returns whether the test failed, which
+  is the case if it errored, timed out, could not be submitted, or if the server reported
+  a pixel error larger than the `threshold`.
+  """
+  identifier = test_identifier(path)
+  if isinstance(error, TimeoutError):
+    print(f"Test '{path}' timed out: {error}")
+    journal.record(identifier, "timeout", timestamp, error=str(error), tier=tier)
+    return True
+  if error is not None:
+    print(f"Test '{path}' failed with error: {error}")
+    journal.record(identifier, "error", timestamp, error=str(error), tier=tier)
+    return True
+
+  if result is None:
+    journal.record(identifier, "skipped", timestamp, tier=tier)
+    return False
+
+  submission = "none"
+  pixel_error = None
+  try:
+    for file in result.files:
+      if bundle is not None:
+        record = {
+          "group": result.group,
+          "name": result.name,
+          "hardware": hardware_for_tier(config["hardware"], tier),
+          "timestamp": timestamp,
+          "timing": result.timing,
+          "commitHash": result.commit
+        }
+        bundle.add(record, result.error, file)
+        submission = "bundled"
+      elif config is not None:
+        success, image_error = submit_image(
+          result,
+          hardware_for_tier(config["hardware"], tier),
+          timestamp,
+          file,
+          config["id"],
+          f"{config['url']}/api/submit-test",
+          controller
+        )
+        if not success:
+          submission = "failed"
+        elif submission != "failed":
+          submission = "submitted"
+        if image_error is not None:
+          pixel_error = max(image_error, pixel_error or 0.0)
+      else:
+        store_image(result, file, tier, timestamp, history)
+        submission = "stored"
+  except Exception as e:
+    # The images that were handled before the error are kept, but the test has to be
+    # reported again to be complete, for example using --rerun-failed
+    print(f"Reporting the results of test '{path}' failed with error: {e}")
+    journal.record(identifier, "error", timestamp, error=str(e), tier=tier)
+    return True
+
+  journal.record(
+    identifier,
+    "success",
+    timestamp,
+    timing=result.timing,
+    commit=result.commit,
+    images=result.files,
+    submission=submission,
+    settle=result.settle,
+    tier=tier,
+    pixel_error=pixel_error
+  )
+  return submission == "failed" or (pixel_error is not None and pixel_error > threshold)
 
 
 
@@ -134,14 +265,288 @@ def setup_argparse():
   parser.add_argument(
     "-a", "--attach",
     dest="attach",
-    help="Run a single test against an already-running OpenSpace instance without "
-      "starting or closing it. Requires exactly one test to be specified via --test. "
-      "When used, --dir is optional; if omitted the test path is resolved relative to "
-      "the current working directory.",
+    help="Run tests against an already-running OpenSpace instance without starting or "
+      "closing it. Requires the tests to be specified via --test, where each entry can "
+      "also be a group folder, in which case all tests in that folder are run. The state "
+      "that a test changes is restored after the test, so that the tests can run back to "
+      "back. When used, --dir is optional; if omitted the test paths are resolved "
+      "relative to the current working directory.",
+    required=False,
+    action="store_true",
+    default=False
+  )
+  parser.add_argument(
+    "--keep-state",
+    dest="keep_state",
+    help="When used with --attach, the state that the tests change in the OpenSpace "
+      "instance is not restored after each test.",
+    required=False,
+    action="store_true",
+    default=False
+  )
+  parser.add_argument(
+    "-j", "--journal",
+    dest="journal",
+    type=str,
+    help="The path to the journal file in which the outcome of every test is recorded as "
+      "soon as it finishes. The journal is used by --resume and --rerun-failed.",
+    required=False,
+    default="journal.jsonl"
+  )
+  parser.add_argument(
+    "--resume",
+    dest="resume",
+    help="Continues the latest run recorded in the journal, skipping all tests that have "
+      "already finished as part of that run. This can be used after the runner or the "
+      "machine crashed partway through a run.",
+    required=False,
+    action="store_true",
+    default=False
+  )
+  parser.add_argument(
+    "--rerun-failed",
+    dest="rerun_failed",
+    help="Only runs the tests that errored, timed out, or whose results could not be "
+      "submitted in the latest run recorded in the journal.",
+    required=False,
+    action="store_true",
+    default=False
+  )
+  parser.add_argument(
+    "-b", "--bundle",
+    dest="bundle",
+    type=str,
+    help="Instead of submitting the results to the regression server, write them into "
+      "a single bundle file at this path. The bundle can later be submitted using the "
+      "`helper/submit_bundle.py` script. The hardware string is taken from the "
+      "'config.json'.",
+    required=False
+  )
+  parser.add_argument(
+    "--settle",
+    dest="settle",
+    help="Instead of waiting a fixed amount of time before taking a screenshot, take "
+      "probe screenshots until the rendering has converged. This requires the `numpy` "
+      "and `Pillow` packages.",
     required=False,
     action="store_true",
     default=False
   )
+  parser.add_argument(
+    "--settle-frames",
+    dest="settle_frames",
+    type=int,
+    help="The number of consecutive probe screenshots that have to agree for the "
+      "rendering to be considered converged.",
+    required=False,
+    default=3
+  )
+  parser.add_argument(
+    "--settle-tolerance",
+    dest="settle_tolerance",
+    type=float,
+    help="The fraction of pixels that may differ between two consecutive probe "
+      "screenshots that are considered to agree.",
+    required=False,
+    default=0.001
+  )
+  parser.add_argument(
+    "--settle-timeout",
+    dest="settle_timeout",
+    type=float,
+    help="The maximum number of seconds to wait for the rendering to converge before "
+      "the screenshot is taken regardless.",
+    required=False,
+    default=60.0
+  )
+
+  parser.add_argument(
+    "--tier",
+    dest="tier",
+    type=str,
+    choices=Tiers.keys(),
+    help="The resolution tier at which the tests are rendered. The 'release' tier renders "
+      "at the full resolution, the 'smoke' tier renders at a quarter of the pixels. "
+      "Results of tiers other than 'release' are submitted with the tier name appended "
+      "to the hardware string so that their references are kept separate.",
+    required=False,
+    default="release"
+  )
+  parser.add_argument(
+    "--escalate",
+    dest="escalate",
+    help="Reruns every test that failed in a tier other than 'release' at the 'release' "
+      "tier. A test failed if it errored, timed out, could not be submitted, or if the "
+      "server reported a pixel error above --escalate-threshold.",
+    required=False,
+    action="store_true",
+    default=False
+  )
+  parser.add_argument(
+    "--escalate-threshold",
+    dest="escalate_threshold",
+    type=float,
+    help="The pixel error reported by the server above which a test is considered to "
+      "have failed for --escalate.",
+    required=False,
+    default=0.001
+  )
+  parser.add_argument(
+    "--history",
+    dest="history",
+    type=str,
+    help="The folder in which the images of all local test runs are kept if no "
+      "'config.json' is provided. Identical images are only stored once. The latest "
+      "image of each test is also available in the `tests` folder.",
+    required=False,
+    default="history"
+  )
+  parser.add_argument(
+    "--history-keep",
+    dest="history_keep",
+    type=int,
+    help="After the run, only keep the latest number of images for each test in the "
+      "local history and remove all images that are no longer needed.",
+    required=False
+  )
+  parser.add_argument(
+    "--history-max-age",
+    dest="history_max_age",
+    type=float,
+    help="After the run, remove all images from the local history that are older than "
+      "this number of days, except for the latest image of each test.",
+    required=False
+  )
+  parser.add_argument(
+    "--shard",
+    dest="shard",
+    type=str,
+    help="Only runs one part of the tests, provided in the form 'i/N' for the i-th of N "
+      "parts. The tests are split deterministically, keeping tests that use the same "
+      "profile together. The parts are balanced by the recorded duration of the tests "
+      "if all machines use the same durations, which are read from --shard-durations or "
+      "taken from the regression server up to --shard-cutoff. Otherwise the profiles "
+      "are distributed by their hash.",
+    required=False
+  )
+  parser.add_argument(
+    "--shard-durations",
+    dest="shard_durations",
+    type=str,
+    help="A file with the test durations that are used to balance the shards, as "
+      "written by the 'shard_report' helper script. Sharing this file between machines "
+      "guarantees that all of them split the tests in the same way.",
+    required=False
+  )
+  parser.add_argument(
+    "--shard-cutoff",
+    dest="shard_cutoff",
+    type=str,
+    help="Balances the shards by the test durations on the regression server that were "
+      "recorded before this point in time (in ISO 8601 format). All machines have to use "
+      "the same value, which prevents results that other shards record during the run "
+      "from changing the split.",
+    required=False
+  )
+  parser.add_argument(
+    "--benchmark-startup",
+    dest="benchmark_startup",
+    type=int,
+    help="Instead of running the tests, start OpenSpace this number of times for each "
+      "profile that is used by the tests and measure the time until the server port is "
+      "open, until the API is connected, and until the profile has finished loading. "
+      "Each profile is measured with an empty cache and, if --overwrite is provided, "
+      "with the cache in that folder.",
+    required=False
+  )
+  parser.add_argument(
+    "--benchmark-output",
+    dest="benchmark_output",
+    type=str,
+    help="The folder into which the results of --benchmark-startup are written as a "
+      "JSON file named after the OpenSpace commit hash.",
+    required=False,
+    default="benchmarks"
+  )
+  parser.add_argument(
+    "--submit-spread",
+    dest="submit_spread",
+    type=float,
+    help="Delays the first submission to the regression server by a random number of "
+      "seconds up to this value, so that runners that finish at the same time do not "
+      "all submit at once.",
+    required=False,
+    default=0.0
+  )
+  parser.add_argument(
+    "--submit-jitter",
+    dest="submit_jitter",
+    type=float,
+    help="Delays every submission to the regression server by a random number of "
+      "seconds up to this value.",
+    required=False,
+    default=0.0
+  )
+  parser.add_argument(
+    "--submit-retries",
+    dest="submit_retries",
+    type=int,
+    help="The number of times a submission is retried if the server is overloaded or "
+      "can not be reached. Other errors are not retried, as the server might have "
+      "stored the result already.",
+    required=False,
+    default=5
+  )
+  parser.add_argument(
+    "--submit-target-latency",
+    dest="submit_target_latency",
+    type=float,
+    help="Submissions that take longer than this number of seconds are considered a "
+      "sign of an overloaded server and reduce the number of concurrent submissions or, "
+      "if only one submission is made at a time, increase the delay between them.",
+    required=False,
+    default=10.0
+  )
+  parser.add_argument(
+    "--submission-stats",
+    dest="submission_stats",
+    type=str,
+    help="Writes the statistics about the submissions to the regression server, such as "
+      "the latencies, retries, and throttling responses, as JSON to this path.",
+    required=False
+  )
+  parser.add_argument(
+    "--overlap",
+    dest="overlap",
+    type=str,
+    choices=Overlap_Policies,
+    help="Determines when the next OpenSpace instance is started. 'none' waits until the "
+      "previous test is completely finished, 'upload' starts the next instance once the "
+      "previous one has exited while its results are being submitted, and 'teardown' "
+      "starts the next instance while the previous one is still shutting down, once it "
+      "has released its server port.",
+    required=False,
+    default="upload"
+  )
+  parser.add_argument(
+    "--cooldown",
+    dest="cooldown",
+    type=float,
+    help="The number of seconds to wait before starting the next OpenSpace instance. "
+      "There is no cooldown after a skipped test.",
+    required=False,
+    default=5.0
+  )
+  parser.add_argument(
+    "--test-timeout",
+    dest="test_timeout",
+    type=float,
+    help="The number of seconds that running the instructions of a single test can take "
+      "before the test is canceled and recorded as timed out. A value of 0 disables the "
+      "limit.",
+    required=False,
+    default=900.0
+  )
 
   args = parser.parse_args()
   return args
@@ -150,28 +555,31 @@ def setup_argparse():
 if __name__ == "__main__":
   global_start = time.perf_counter()
   if os.path.exists("config.json"):
-    submit_images = True
     with open("config.json") as f:
       config = json.load(f)
-      url = config["url"]
-      submit_url = f"{url}/api/submit-test"
-      hardware = config["hardware"]
-      runner_id = config["id"]
-    print(f"Submit URL: {submit_url}")
-    print(f"Hardware: {hardware}")
-    print(f"ID: {runner_id}")
+    print(f"Submit URL: {config['url']}/api/submit-test")
+    print(f"Hardware: {config['hardware']}")
+    print(f"ID: {config['id']}")
   else:
     print("No 'config.json' provided. Test results will be stored locally instead")
-    submit_images = False
+    config = None
 
 
   args = setup_argparse()
 
+  if args.resume and args.rerun_failed:
+    raise Exception("--resume and --rerun-failed can not be used at the same time")
+  if args.attach and args.tier != "release":
+    raise Exception("--tier can not be used with --attach")
+  if args.bundle and config is None:
+    raise Exception("--bundle requires a 'config.json' that provides the hardware")
+  if args.bundle and args.resume and os.path.exists(args.bundle):
+    raise Exception(f"Bundle '{args.bundle}' already exists, use a new path to resume")
+
   if args.attach:
     if not args.test:
-      raise Exception("--attach requires exactly one test to be specified via --test")
-    if "," in args.test:
-      raise Exception("--attach requires exactly one test, not a comma-separated list")
+      raise Exception("--attach requires the tests to be specified via --test")
+    executable = None
   else:
     if args.dir is None:
       raise Exception("--dir is required when not using --attach")
@@ -192,82 +600,194 @@ if __name__ == "__main__":
 
 
 
-  # Running the tests
+  # Collecting the tests
   if args.attach:
-    test_arg = args.test.strip()
-    if os.path.isfile(test_arg):
-      path = test_arg
-    elif args.dir:
-      path = f"{args.dir}/{test_base_dir}/{test_arg}.ostest"
-    else:
-      path = f"{test_arg}.ostest"
-
-    if not os.path.isfile(path):
-      raise Exception(f"Could not find test '{path}'")
-
-    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    try:
-      result = run_single_test_attached(path)
-    except Exception as e:
-      print(f"Test '{path}' failed with error: {e}")
-    else:
-      for file in (result.files if result is not None else []):
-        if submit_images:
-          submit_image(result, hardware, timestamp, file, runner_id, submit_url)
-        else:
-          store_image(result, file)
-
+    paths = []
+    for test_arg in args.test.split(","):
+      test_arg = test_arg.strip()
+      base = f"{args.dir}/{test_base_dir}/{test_arg}" if args.dir else test_arg
+      if os.path.isfile(test_arg):
+        paths.append(test_arg)
+      elif os.path.isfile(f"{base}.ostest"):
+        paths.append(f"{base}.ostest")
+      elif os.path.isdir(base):
+        files = sorted(glob.glob(f"{base}/**/*.ostest", recursive=True))
+        paths.extend([ file.replace(os.sep, "/") for file in files ])
+      else:
+        raise Exception(f"Could not find test '{base}.ostest' or group '{base}'")
+    print(f"Running tests: {paths}")
   elif args.test is None:
     print("Running all tests in OpenSpace folder")
     files = glob.glob(f"{args.dir}/{test_base_dir}/**/*.ostest", recursive=True)
-    for file in files:
-      # Normalize the path endings to always do forward slashes
-      file = file.replace(os.sep, "/")
-      timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
-      if args.dry_run:
-        print(f"Test: '{file}' run against executable '{executable}'")
-        continue
-
-      try:
-        result = run_single_test(file, executable)
-      except Exception as e:
-        print(f"Test '{file}' failed with error: {e}")
-        continue
-      if result is None:
-        continue
-      for img in result.files:
-        if submit_images:
-          submit_image(result, hardware, timestamp, img, runner_id, submit_url)
-        else:
-          store_image(result, img)
-      time.sleep(5.0)
-  elif not args.attach:
+    # Normalize the path endings to always do forward slashes
+    paths = [ file.replace(os.sep, "/") for file in files ]
+  else:
     tests = args.test.split(",")
     print(f"Running tests: {tests}")
+    paths = []
     for test in tests:
       path = f"{args.dir}/{test_base_dir}/{test}.ostest"
       if not os.path.isfile(path):
         raise Exception(f"Could not find test '{path}'")
+      paths.append(path)
 
-      timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+  if args.benchmark_startup:
+    if args.attach:
+      raise Exception("--benchmark-startup can not be used with --attach")
+    profiles = []
+    for path in paths:
+      profile = Test(path).profile
+      if profile not in profiles:
+        profiles.append(profile)
+    print(f"Benchmarking startup for profiles: {profiles}")
 
-      if args.dry_run:
-        print(f"Test: '{path}' run against executable '{executable}'")
-        continue
+    results = benchmark_startup(
+      executable,
+      args.dir,
+      profiles,
+      args.benchmark_startup,
+      window_configuration(args.tier),
+      args.overwrite_path
+    )
+    results["hardware"] = config["hardware"] if config is not None else None
+    results["tier"] = args.tier
 
+    for profile, conditions in results["summary"].items():
+      for condition, metrics in conditions.items():
+        for metric, summary in metrics.items():
+          if summary["count"] > 0:
+            print(
+              f"{profile} ({condition}) {metric}: median {summary['median']:.2f} s, "
+              f"min {summary['min']:.2f} s, max {summary['max']:.2f} s, "
+              f"{summary['missing']} missing"
+            )
+
+    os.makedirs(args.benchmark_output, exist_ok=True)
+    output = f"{args.benchmark_output}/{results['commit'] or 'unknown'}.json"
+    with open(output, "w") as f:
+      json.dump(results, f, indent=2)
+    print(f"Wrote startup benchmark to '{output}'")
+    exit(0)
+
+  journal = Journal(args.journal)
+  # When resuming, the tests that were selected when the run was started are used instead
+  # of selecting them again, as for example the split of the shards might have changed
+  selected = journal.selected_tests() if args.resume else None
+  if args.shard and selected is None:
+    index, count = parse_shard(args.shard)
+    if args.shard_durations:
+      durations = read_durations(args.shard_durations)
+    elif config is not None and args.shard_cutoff:
+      cutoff = parse_cutoff(args.shard_cutoff)
+      durations = server_durations(config["url"], config["hardware"], cutoff)
+    else:
+      # Durations that are not shared between all machines, such as the ones in the local
+      # journal, would lead to a different split on every machine
+      print("No shared test durations available, splitting the tests by their profile")
+      durations = {}
+    paths = partition(paths, count, durations)[index - 1]
+    print(f"Running shard {index} of {count} with {len(paths)} tests")
+  if args.rerun_failed:
+    failed = journal.failed_tests()
+    paths = [ path for path in paths if test_identifier(path) in failed ]
+    print(f"Rerunning {len(paths)} failed tests from the previous run")
+  if args.resume:
+    if selected is not None:
+      paths = [ path for path in paths if test_identifier(path) in selected ]
+    completed = journal.completed_tests()
+    remaining = [ path for path in paths if test_identifier(path) not in completed ]
+    print(f"Resuming run, skipping {len(paths) - len(remaining)} completed tests")
+    paths = remaining
+
+
+
+  # Running the tests
+  history = ResultHistory(args.history) if config is None else None
+  controller = SubmissionController(
+    max_concurrency=1,
+    target_latency=args.submit_target_latency,
+    max_retries=args.submit_retries,
+    spread=args.submit_spread,
+    jitter=args.submit_jitter
+  )
+
+  settle = None
+  if args.settle:
+    settle = SettleOptions(args.settle_frames, args.settle_tolerance, args.settle_timeout)
+  test_timeout = args.test_timeout if args.test_timeout > 0 else None
+
+  bundle = None
+  if not args.dry_run:
+    tests = [ test_identifier(path) for path in paths ]
+    journal.start_run(tests, resume=args.resume)
+    if args.bundle:
+      bundle = BundleWriter(args.bundle)
+
+  if args.dry_run:
+    for path in paths:
+      print(f"Test: '{path}' run against executable '{executable}'")
+  elif args.attach:
+    for path in paths:
+      timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+      result = None
+      error = None
       try:
-        result = run_single_test(path, executable)
+        result = run_single_test_attached(
+          path,
+          settle,
+          restore=not args.keep_state,
+          timeout=test_timeout
+        )
       except Exception as e:
-        print(f"Test '{path}' failed with error: {e}")
-        continue
-      if result is None:
-        continue
-      for file in result.files:
-        if submit_images:
-          submit_image(result, hardware, timestamp, file, runner_id, submit_url)
-        else:
-          store_image(result, file)
-      time.sleep(5.0)
+        error = e
+      report_result(
+        path, timestamp, result, error, journal, config, bundle, args.tier,
+        args.escalate_threshold, history, controller
+      )
+  else:
+    failed = []
+    def run_tier(tier, paths):
+      print(f"Running {len(paths)} tests in tier '{tier}'")
+      def on_result(path, timestamp, result, error):
+        has_failed = report_result(
+          path, timestamp, result, error, journal, config, bundle, tier,
+          args.escalate_threshold, history, controller
+        )
+        if has_failed:
+          failed.append(path)
+
+      orchestrator = Orchestrator(
+        executable,
+        window_configuration(tier),
+        on_result,
+        args.overlap,
+        args.cooldown,
+        settle,
+        test_timeout
+      )
+      orchestrator.run(paths)
+      orchestrator.print_statistics()
+
+    run_tier(args.tier, paths)
+    if args.escalate and args.tier != "release" and len(failed) > 0:
+      escalated = list(failed)
+      failed.clear()
+      print(f"Rerunning {len(escalated)} failed tests at the 'release' tier")
+      run_tier("release", escalated)
+
+  if bundle is not None:
+    bundle.close()
+    print(f"Wrote {len(bundle.manifest)} results to bundle '{args.bundle}'")
+
+  if config is not None and not args.bundle and not args.dry_run:
+    controller.print_statistics()
+    if args.submission_stats:
+      with open(args.submission_stats, "w") as f:
+        json.dump(controller.statistics(), f, indent=2)
+
+  if history is not None and (args.history_keep or args.history_max_age):
+    entries, blobs = history.collect_garbage(args.history_keep, args.history_max_age)
+    print(f"Removed {entries} entries and {blobs} images from the local history")
 
   global_end = time.perf_counter()
   print(f"Total time for all tests: {global_end - global_start}")
@@ -0,0 +1,248 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import asyncio
+import datetime
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from openspace import Api
+from .openspace import launch_openspace, stop_openspace, write_configuration_overwrite
+
+
+
+# The points in time during the startup of OpenSpace that are measured, in seconds after
+# the process was started:
+#   - `port`: The server port of OpenSpace accepts connections
+#   - `connected`: The Python API is connected and ready to take commands
+#   - `loaded`: OpenSpace has finished loading the profile
+Startup_Metrics = [ "port", "connected", "loaded" ]
+
+
+
+async def wait_for_port(process, port, timeout):
+  """
+  Waits until the `port` on the local machine accepts connections. An Exception is raised
+  if the `process` exits in the meantime and a TimeoutError if the port is not open after
+  `timeout` seconds.
+  """
+  start = time.perf_counter()
+  while time.perf_counter() - start < timeout:
+    if process.returncode is not None:
+      raise Exception(f"OpenSpace exited with code {process.returncode} during startup")
+    try:
+      _, writer = await asyncio.open_connection("localhost", port)
+      writer.close()
+      await writer.wait_closed()
+      return
+    except OSError:
+      await asyncio.sleep(0.1)
+  raise TimeoutError(f"Port {port} did not open within {timeout} s")
+
+
+
+def subscribe_to_loading(os_api):
+  """
+  Subscribes to the event that OpenSpace sends once it has finished loading the profile.
+  As the event is only sent once, the subscription has to be started before any other
+  command is sent to OpenSpace, as the profile might otherwise finish loading before the
+  subscription is in place. This function returns the topic for `wait_for_loading`.
+  """
+  return os_api.startTopic(
+    "event",
+    { "event": "ProfileLoadingFinished", "status": "start_subscription" }
+  )
+
+
+
+async def wait_for_loading(topic, timeout):
+  """
+  Waits until OpenSpace signals through the `topic` created by `subscribe_to_loading` that
+  it has finished loading the profile. Returns whether the event was received within
+  `timeout` seconds. The subscription is canceled afterwards.
+  """
+  async def wait():
+    async for _ in topic.iterator():
+      return
+
+  try:
+    await asyncio.wait_for(wait(), timeout)
+    return True
+  except asyncio.TimeoutError:
+    return False
+  finally:
+    topic.cancel()
+
+
+
+async def measure_startup(executable, profile, window_config, timeout=300.0):
+  """
+  Starts OpenSpace with the `profile` once and measures how long it takes to reach each of
+  the `Startup_Metrics`. This function returns a dictionary with the seconds for each of
+  the metrics, where a metric that was not reached within `timeout` seconds is None, and
+  the commit hash of OpenSpace. If the startup fails, the error is printed and the metrics
+  that were reached before the failure are returned.
+  """
+  timings = { metric: None for metric in Startup_Metrics }
+  commit = None
+
+  start = time.perf_counter()
+  process, stderr_task = await launch_openspace(executable, profile, window_config)
+  os_api = None
+  try:
+    await wait_for_port(process, 4681, timeout)
+    timings["port"] = time.perf_counter() - start
+
+    os_api = Api("localhost", 4681)
+    os_api.connect()
+    topic = subscribe_to_loading(os_api)
+    openspace = await os_api.singleReturnLibrary()
+    timings["connected"] = time.perf_counter() - start
+
+    remaining = timeout - (time.perf_counter() - start)
+    if await wait_for_loading(topic, remaining):
+      timings["loaded"] = time.perf_counter() - start
+
+    version = await openspace.version()
+    commit = version["Commit"]
+    await openspace.toggleShutdown()
+  except Exception as e:
+    print(f"  Startup failed with error: {e}")
+  finally:
+    if os_api is not None:
+      os_api.disconnect()
+    await stop_openspace(process, stderr_task)
+
+  return timings, commit
+
+
+
+def summarize(values: list[float]) -> dict:
+  """
+  Returns the distribution of the measured `values`. Measurements that did not finish are
+  ignored, but counted as `missing`.
+  """
+  finished = [ v for v in values if v is not None ]
+  if len(finished) == 0:
+    return { "count": 0, "missing": len(values) }
+
+  return {
+    "count": len(finished),
+    "missing": len(values) - len(finished),
+    "min": min(finished),
+    "median": statistics.median(finished),
+    "mean": statistics.mean(finished),
+    "max": max(finished),
+    "stdev": statistics.stdev(finished) if len(finished) > 1 else 0.0
+  }
+
+
+
+def benchmark_startup(executable, base_path, profiles: list[str], iterations: int,
+                      window_config, overwrite_path=None) -> dict:
+  """
+  Measures the startup of OpenSpace for each of the `profiles` `iterations` times. The
+  cold-cache runs use an empty data folder for every launch, so that all data has to be
+  synchronized and cached from scratch. If an `overwrite_path` is provided, the same
+  number of warm-cache runs are made using that folder after one additional unmeasured
+  launch that fills the cache. The `openspace.cfg.override` file in `base_path` is
+  restored afterwards. This function returns the results of all runs and their
+  distribution per profile, condition, and metric.
+  """
+  override_file = f"{base_path}/openspace.cfg.override"
+  previous_override = None
+  if os.path.exists(override_file):
+    with open(override_file) as f:
+      previous_override = f.read()
+
+  conditions = [ "cold" ] + ([ "warm" ] if overwrite_path is not None else [])
+  runs = []
+  commit = None
+
+  async def run():
+    nonlocal commit
+    for profile in profiles:
+      for condition in conditions:
+        if condition == "warm":
+          write_configuration_overwrite(base_path, overwrite_path)
+          print(f"Priming cache for profile '{profile}'")
+          try:
+            await measure_startup(executable, profile, window_config)
+          except Exception as e:
+            print(f"  Priming failed with error: {e}")
+
+        for i in range(iterations):
+          cache = None
+          if condition == "cold":
+            cache = tempfile.mkdtemp()
+            write_configuration_overwrite(base_path, cache)
+
+          print(f"Starting profile '{profile}' ({condition}, {i + 1}/{iterations})")
+          try:
+            timings, version = await measure_startup(executable, profile, window_config)
+            commit = version or commit
+          except Exception as e:
+            print(f"  Launching OpenSpace failed with error: {e}")
+            timings = { metric: None for metric in Startup_Metrics }
+          finally:
+            if cache is not None:
+              shutil.rmtree(cache, ignore_errors=True)
+
+          print(f"  {timings}")
+          runs.append({
+            "profile": profile,
+            "condition": condition,
+            "iteration": i,
+            **timings
+          })
+
+  try:
+    asyncio.run(run())
+  finally:
+    if previous_override is not None:
+      with open(override_file, "w") as f:
+        f.write(previous_override)
+    elif os.path.exists(override_file):
+      os.remove(override_file)
+
+  summary = {}
+  for profile in profiles:
+    summary[profile] = {}
+    for condition in conditions:
+      selected = [
+        run for run in runs if run["profile"] == profile and run["condition"] == condition
+      ]
+      summary[profile][condition] = {
+        metric: summarize([ run[metric] for run in selected ]) for metric in Startup_Metrics
+      }
+
+  return {
+    "commit": commit,
+    "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    "iterations": iterations,
+    "runs": runs,
+    "summary": summary
+  }
@@ -0,0 +1,236 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import concurrent.futures
+import functools
+import io
+import json
+import os
+import requests
+import tarfile
+import threading
+from requests.adapters import HTTPAdapter
+from .ratecontrol import SubmissionController
+
+
+
+class BundleWriter:
+  """
+  Writes test results into a single-file bundle that can be moved to a regression server
+  at a later point, for example from a runner that does not have network access, or that
+  can be used to transfer results between servers in bulk.
+
+  A bundle is an uncompressed tar file. Every result is stored in its own folder
+  `results/<index>/` that contains, in this order, the `result.json` with the fields that
+  are needed to submit the result (`group`, `name`, `hardware`, `timestamp`, `timing`,
+  and `commitHash`), the `log.txt`, and the `candidate.png`. The last entry of the bundle is a `manifest.json` that lists all of the results that are
+  contained in the bundle, so a bundle without a manifest was not written completely. As
+  the results are written and read one at a time, neither writing nor reading a bundle
+  requires all images to be kept in memory. Each result is on disk once `add` returns, so
+  the results that were added before a crash are kept.
+  """
+  def __init__(self, path: str):
+    self.path = path
+    self.tar = tarfile.open(path, "w")
+    self.manifest = []
+
+
+
+  def __enter__(self):
+    return self
+
+
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    if exc_type is None:
+      self.close()
+    elif self.tar is not None:
+      # Leave out the manifest so that the incomplete bundle can be recognized as such
+      self.tar.close()
+      self.tar = None
+
+
+
+  def add(self, record: dict, log, image):
+    """
+    Adds a new result to the bundle. The `record` must contain the fields that are
+    required by the `/api/submit-test` API, the `log` is the contents of the error log,
+    and the `image` is either a path to the candidate image or its contents.
+    """
+    for key in [ "group", "name", "hardware", "timestamp", "timing", "commitHash" ]:
+      if key not in record:
+        raise Exception(f"Missing key '{key}' in bundle record")
+
+    folder = f"results/{len(self.manifest):06}"
+    self._add_bytes(f"{folder}/result.json", json.dumps(record).encode())
+    self._add_bytes(f"{folder}/log.txt", log if isinstance(log, bytes) else log.encode())
+    if isinstance(image, bytes):
+      self._add_bytes(f"{folder}/candidate.png", image)
+    else:
+      self.tar.add(image, arcname=f"{folder}/candidate.png")
+    self.manifest.append(record)
+
+    # The result is recorded as bundled right afterwards, so it has to be on disk
+    self.tar.fileobj.flush()
+    os.fsync(self.tar.fileobj.fileno())
+
+
+
+  def close(self):
+    """
+    Writes the manifest and finishes the bundle. No more results can be added afterwards.
+    """
+    if self.tar is None:
+      return
+    self._add_bytes("manifest.json", json.dumps(self.manifest, indent=2).encode())
+    self.tar.close()
+    self.tar = None
+
+
+
+  def _add_bytes(self, name: str, content: bytes):
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    self.tar.addfile(info, io.BytesIO(content))
+
+
+
+def read_bundle(path: str):
+  """
+  Reads the bundle at `path` and yields a tuple of the record, the log, and the image for
+  each result in the order in which they were added to the bundle. Only a single result
+  is kept in memory at a time. If the bundle does not have a manifest, an exception is
+  raised after the last result, as the bundle was not written completely.
+  """
+  with tarfile.open(path, "r|") as tar:
+    record = None
+    log = None
+    has_manifest = False
+    for member in tar:
+      if member.name == "manifest.json":
+        has_manifest = True
+      if not member.isfile() or not member.name.startswith("results/"):
+        continue
+
+      content = tar.extractfile(member).read()
+      if member.name.endswith("/result.json"):
+        record = json.loads(content)
+        log = None
+      elif member.name.endswith("/log.txt"):
+        log = content
+      elif member.name.endswith("/candidate.png"):
+        if record is None or log is None:
+          raise Exception(f"Malformed bundle '{path}': Incomplete entry {member.name}")
+        yield record, log, content
+        record = None
+        log = None
+
+  if not has_manifest:
+    raise Exception(f"Incomplete bundle '{path}': Missing manifest")
+
+
+
+def submit_results(results, url: str, runner: str, workers: int = 4,
+                   controller: SubmissionController = None):
+  """
+  Submits all results from the iterable `results`, which produces tuples of the record,
+  the log, and the image (for example `read_bundle`), to the server at `url` using the
+  runner id `runner`. The submissions are done concurrently using up to `workers` pooled
+  connections, where the actual number of concurrent submissions is adapted to the load
+  of the server by the `controller`. At most twice as many results as there are workers
+  are held in memory at the same time. As the server uses the first result that it
+  receives for a test as the reference, the first result of every test is submitted on
+  its own before any other result of the same test. This function returns the number of
+  successful and failed submissions.
+  """
+  if controller is None:
+    controller = SubmissionController(max_concurrency=workers)
+
+  session = requests.Session()
+  adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+  session.mount("http://", adapter)
+  session.mount("https://", adapter)
+
+  submit_url = f"{url}/api/submit-test"
+  in_flight = threading.BoundedSemaphore(2 * workers)
+  lock = threading.Lock()
+  counts = { "success": 0, "failure": 0 }
+
+  def submit(key, record, log, image):
+    try:
+      res = controller.request(lambda: session.post(
+        submit_url,
+        data = {
+          "group": record["group"],
+          "name": record["name"],
+          "hardware": record["hardware"],
+          "runnerID": runner,
+          "timestamp": record["timestamp"],
+          "timing": record["timing"],
+          "commitHash": record["commitHash"]
+        },
+        files = {
+          "file": image,
+          "log": log
+        },
+        timeout = controller.timeout
+      ))
+      success = res.status_code == 200
+      if success:
+        print(f"Submitted {key}")
+      else:
+        print(f"Submission of {key} failed with error {res.status_code}")
+        print(res.text)
+    except requests.RequestException as e:
+      success = False
+      print(f"Submission of {key} failed with error {e}")
+    finally:
+      in_flight.release()
+
+    with lock:
+      counts["success" if success else "failure"] += 1
+
+  def finished(key, future):
+    # Any exception other than the request errors handled in `submit` ends up here
+    if future.exception() is not None:
+      print(f"Submission of {key} failed with error {future.exception()}")
+      with lock:
+        counts["failure"] += 1
+
+  tests = set()
+  with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+    for record, log, image in results:
+      test = (record["group"], record["name"], record["hardware"])
+      key = f"{test[0]}/{test[1]}/{test[2]}/{record['timestamp']}"
+      in_flight.acquire()
+      future = executor.submit(submit, key, record, log, image)
+      future.add_done_callback(functools.partial(finished, key))
+      if test not in tests:
+        # The first result of a test becomes its reference on the server, so it has to
+        # arrive before any of the other results of the same test
+        tests.add(test)
+        concurrent.futures.wait([ future ])
+
+  session.close()
+  return counts["success"], counts["failure"]
@@ -0,0 +1,189 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+
+
+class ResultHistory:
+  """
+  Stores the images of every local test run, so that the results of previous runs can be
+  compared against each other without a regression server. Each distinct image is stored
+  only once, named by the hash of its contents, so repeated runs that produce the same
+  image do not take up additional space. The history is stored in the `root` folder:
+    - `blobs/<xx>/<hash>.png`: The image with the SHA-256 `hash`, where `xx` are the first
+                               two characters of the hash
+    - `index.jsonl`: One line for each stored image with the `group`, `name`, `tier`,
+                     `timestamp`, `commit`, and `timing` of the test run and the `hash` of
+                     the image
+  """
+  def __init__(self, root: str):
+    self.root = root
+    self.index_path = f"{root}/index.jsonl"
+
+
+
+  def blob_path(self, hash: str) -> str:
+    """
+    Returns the path at which the image with the provided `hash` is stored.
+    """
+    return f"{self.root}/blobs/{hash[0:2]}/{hash}.png"
+
+
+
+  def add(self, group: str, name: str, tier: str, timestamp: str, commit: str,
+          timing: float, file: str) -> str:
+    """
+    Adds the image `file` of the test `group`/`name` to the history and returns the path
+    to the stored image. If an identical image was already stored previously, that image
+    is reused.
+    """
+    with open(file, "rb") as f:
+      hash = hashlib.file_digest(f, "sha256").hexdigest()
+
+    blob = self.blob_path(hash)
+    if not os.path.exists(blob):
+      os.makedirs(os.path.dirname(blob), exist_ok=True)
+      # Write to a temporary file first so that an interrupted copy does not leave a
+      # corrupted image behind
+      fd, tmp = tempfile.mkstemp(dir=os.path.dirname(blob))
+      os.close(fd)
+      shutil.copyfile(file, tmp)
+      os.replace(tmp, blob)
+
+    entry = {
+      "group": group,
+      "name": name,
+      "tier": tier,
+      "timestamp": timestamp,
+      "commit": commit,
+      "timing": timing,
+      "hash": hash
+    }
+    with open(self.index_path, "a") as f:
+      f.write(json.dumps(entry) + "\n")
+    return blob
+
+
+
+  def entries(self) -> list[dict]:
+    """
+    Returns all entries of the index in the order in which they were added.
+    """
+    if not os.path.exists(self.index_path):
+      return []
+
+    entries = []
+    with open(self.index_path) as f:
+      for line in f:
+        try:
+          entries.append(json.loads(line))
+        except json.JSONDecodeError:
+          # A line that was only partially written when the runner died
+          continue
+    return entries
+
+
+
+  def query(self, group: str = None, name: str = None, tier: str = None,
+            commit: str = None, last: int = None) -> list[dict]:
+    """
+    Returns the entries that match all of the provided `group`, `name`, `tier`, and
+    `commit`, sorted by their timestamp. If `last` is provided, only the latest `last`
+    entries for each test are returned.
+    """
+    matches = [
+      entry for entry in self.entries()
+        if (group is None or entry["group"] == group) and
+           (name is None or entry["name"] == name) and
+           (tier is None or entry["tier"] == tier) and
+           (commit is None or (entry["commit"] or "").startswith(commit))
+    ]
+    matches.sort(key=lambda entry: entry["timestamp"])
+
+    if last is not None:
+      per_test = {}
+      for entry in matches:
+        per_test.setdefault((entry["group"], entry["name"], entry["tier"]), []).append(entry)
+      matches = [ entry for test in per_test.values() for entry in test[-last:] ]
+      matches.sort(key=lambda entry: entry["timestamp"])
+    return matches
+
+
+
+  def collect_garbage(self, keep: int = None, max_age_days: float = None):
+    """
+    Applies the retention policy and removes all images that are no longer referenced.
+    For each test, only the latest `keep` entries are retained and entries that are older
+    than `max_age_days` are removed, but the latest entry of a test is never removed. This
+    function returns the number of removed entries and removed images.
+    """
+    entries = self.entries()
+    if len(entries) == 0:
+      return 0, 0
+    entries.sort(key=lambda entry: entry["timestamp"])
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    per_test = {}
+    for entry in entries:
+      per_test.setdefault((entry["group"], entry["name"], entry["tier"]), []).append(entry)
+
+    retained = []
+    for test in per_test.values():
+      if keep is not None:
+        test = test[-max(keep, 1):]
+      if max_age_days is not None:
+        limit = now - datetime.timedelta(days=max_age_days)
+        recent = [
+          entry for entry in test
+            if datetime.datetime.fromisoformat(entry["timestamp"]) >= limit
+        ]
+        test = recent if len(recent) > 0 else test[-1:]
+      retained.extend(test)
+    retained.sort(key=lambda entry: entry["timestamp"])
+
+    # Rewrite the index atomically so that an interruption does not lose the history
+    fd, tmp = tempfile.mkstemp(dir=self.root)
+    with os.fdopen(fd, "w") as f:
+      for entry in retained:
+        f.write(json.dumps(entry) + "\n")
+    os.replace(tmp, self.index_path)
+
+    referenced = set(entry["hash"] for entry in retained)
+    if not os.path.exists(f"{self.root}/blobs"):
+      return len(entries) - len(retained), 0
+    removed_blobs = 0
+    for folder in os.listdir(f"{self.root}/blobs"):
+      for blob in os.listdir(f"{self.root}/blobs/{folder}"):
+        hash, extension = os.path.splitext(blob)
+        if extension == ".png" and hash not in referenced:
+          os.remove(f"{self.root}/blobs/{folder}/{blob}")
+          removed_blobs = removed_blobs + 1
+
+    return len(entries) - len(retained), removed_blobs
@@ -23,6 +23,11 @@
 ##########################################################################################
 
 import asyncio
+import glob
+import os
+import shutil
+import tempfile
+import time
 
 
 
@@ -42,6 +47,115 @@ Allowed_Types = [
 
 
 
+class SettleOptions:
+  """
+  Configures the adaptive settle mode for screenshots. Instead of waiting a fixed amount
+  of time before taking a screenshot, probe screenshots are taken repeatedly until the
+  rendering has converged, that is until `frames` consecutive probes differ in at most a
+  `tolerance` fraction of their pixels. If the rendering has not converged after
+  `timeout` seconds, the screenshot is taken regardless. The `interval` is the number of
+  seconds between two probe screenshots.
+  """
+  def __init__(self, frames=3, tolerance=0.001, timeout=60.0, interval=0.5):
+    if frames < 2:
+      raise Exception("At least two frames are needed to detect convergence")
+    self.frames = frames
+    self.tolerance = tolerance
+    self.timeout = timeout
+    self.interval = interval
+
+
+
+async def capture_frame(openspace, folder, timeout=10.0):
+  """
+  Takes a screenshot and waits until the new image has been written to the `folder`. The
+  path to the new image is returned. If no new image appears within `timeout` seconds, a
+  TimeoutError is raised.
+  """
+  before = set(glob.glob(f"{folder}/*.png"))
+  await openspace.takeScreenshot()
+
+  start = time.perf_counter()
+  while time.perf_counter() - start < timeout:
+    await asyncio.sleep(0.1)
+    new_files = set(glob.glob(f"{folder}/*.png")) - before
+    if len(new_files) == 0:
+      continue
+
+    # Wait until the file is no longer being written to
+    path = new_files.pop()
+    size = -1
+    while os.path.getsize(path) != size:
+      size = os.path.getsize(path)
+      await asyncio.sleep(0.1)
+    return path
+
+  raise TimeoutError(f"No screenshot was written to '{folder}' within {timeout} s")
+
+
+
+def load_frame(path):
+  """
+  Loads the image at `path` as a NumPy array of RGB values. A file that is still being
+  written by OpenSpace can fail to load, in which case None is returned.
+  """
+  # These are only needed for the settle mode, so we don't require them otherwise
+  import numpy as np
+  from PIL import Image
+
+  try:
+    with Image.open(path) as image:
+      return np.asarray(image.convert("RGB"), dtype=np.int16)
+  except OSError:
+    return None
+
+
+
+async def wait_for_convergence(openspace, folder, settle: SettleOptions):
+  """
+  Takes probe screenshots until the rendering has converged according to the `settle`
+  options or until the maximum wait time has passed. The probe screenshots are moved out
+  of the screenshot `folder` into a scratch location so that they are not mistaken for
+  test images. This function returns the number of probe frames, the number of seconds
+  it took, and whether the rendering converged.
+  """
+  import numpy as np
+
+  start = time.perf_counter()
+  n_frames = 0
+  n_stable = 0
+  previous = None
+  with tempfile.TemporaryDirectory() as scratch:
+    while time.perf_counter() - start < settle.timeout:
+      path = await capture_frame(openspace, folder)
+      probe = shutil.move(path, f"{scratch}/{n_frames}.png")
+      frame = load_frame(probe)
+      for _ in range(10):
+        if frame is not None:
+          break
+        await asyncio.sleep(0.1)
+        frame = load_frame(probe)
+      if frame is None:
+        raise Exception(f"Could not load probe screenshot '{probe}'")
+      n_frames = n_frames + 1
+
+      if previous is not None and previous.shape == frame.shape:
+        # Fraction of pixels for which any of the color channels changed
+        changed = np.count_nonzero(np.any(previous != frame, axis=2)) / frame[..., 0].size
+        n_stable = n_stable + 1 if changed <= settle.tolerance else 1
+      else:
+        n_stable = 1
+      previous = frame
+
+      if n_stable >= settle.frames:
+        return n_frames, time.perf_counter() - start, True
+
+      await asyncio.sleep(settle.interval)
+
+  return n_frames, time.perf_counter() - start, False
+
+
+
 class Instruction:
   """
   This object represents an individual test instruction. An entire test is made up of many
@@ -82,12 +196,17 @@ class Instruction:
 
 
 
-  async def run(self, openspace):
+  async def run(self, openspace, settle: SettleOptions = None):
     """
     Runs this instruction against the OpenSpace API object `openspace` that was passed to
     this function. If this instruction is not a valid instruction, either because it has
     a type that is not recognized, or it is missing essential parameters, an Exception is
     raised.
+
+    If `settle` is provided, a screenshot instruction waits for the rendering to converge
+    instead of waiting a fixed amount of time and returns a dictionary with the number of
+    probe `frames`, the `time` in seconds it took, and whether it `converged`. All other
+    instructions return None.
     """
 
     match self.type:
@@ -138,6 +257,20 @@ class Instruction:
         print(f"    Start Playback: {self.value}")
         await openspace.sessionRecording.startPlayback(self.value)
 
+      case "screenshot" if settle is not None:
+        print("    Take Screenshot (waiting for convergence)")
+        folder = await openspace.absPath("${SCREENSHOTS}")
+        frames, duration, converged = await wait_for_convergence(openspace, folder, settle)
+        if converged:
+          print(f"    Converged after {frames} frames in {duration:.2f} s")
+        else:
+          print(f"    Did not converge after {frames} frames in {duration:.2f} s")
+
+        # The last probe already was the converged image, but we take the actual
+        # screenshot now that we know the rendering has settled
+        await capture_frame(openspace, folder)
+        return { "frames": frames, "time": duration, "converged": converged }
+
       case "screenshot":
         print("    Take Screenshot")
         # We'll wait an extra 5 seconds before taking a screenshot just to be sure that
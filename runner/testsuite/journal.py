@@ -0,0 +1,205 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import datetime
+import json
+import os
+import uuid
+
+
+
+# The status values that mark a test as needing to be run again by `--rerun-failed`
+Failed_Status = [ "error", "timeout" ]
+
+
+
+class Journal:
+  """
+  An append-only record of the test runs that were executed by this runner. The journal
+  is stored as a JSON Lines file in which every line is a single, self-contained event.
+  Each event is written and flushed to disk as soon as it happens, so that a runner that
+  is killed or a machine that reboots partway through a run loses at most the test that
+  was executing at the time.
+
+  There are two kinds of events:
+    - `run`: Marks the start (or the resumption) of a run. Each run has an `id` that is
+             shared by all tests that were executed as part of that run and the list of
+             `tests` that were selected to be run
+    - `test`: The result of a single test with its `status` (`success`, `error`,
+              `timeout`, or `skipped`), the `timing`, the `commit`, the `images` that
+              were created, the `submission` state (`submitted`, `stored`, `bundled`,
+              `failed`, or `none`), the `settle` information if the screenshot was
+              taken in settle mode, the resolution `tier`, and the `pixelError` that
+              the server reported
+  """
+  def __init__(self, path: str):
+    self.path = path
+    self.run_id = None
+
+    self.events = []
+    # If the last line was only partially written, the next event has to start on a line
+    # of its own
+    self.needs_newline = False
+    if os.path.exists(path):
+      with open(path) as f:
+        lines = f.readlines()
+      if len(lines) > 0 and not lines[-1].endswith("\n"):
+        self.needs_newline = True
+      for line in lines:
+        line = line.strip()
+        if line == "":
+          continue
+        try:
+          self.events.append(json.loads(line))
+        except json.JSONDecodeError:
+          # If the runner died while writing the last line, that line is incomplete and
+          # can not be recovered. All of the previous lines are unaffected by this
+          print(f"Ignoring corrupt line in journal '{path}'")
+
+
+
+  def latest_run(self):
+    """
+    Returns the identifier of the latest run that is recorded in this journal or `None` if
+    the journal does not contain any runs yet.
+    """
+    for event in reversed(self.events):
+      if event["event"] == "run":
+        return event["id"]
+    return None
+
+
+
+  def tests_in_run(self, run_id) -> dict:
+    """
+    Returns the latest `test` event for each test that is recorded as part of the run
+    `run_id`. The returned dictionary maps from the test identifier to the event.
+    """
+    tests = {}
+    for event in self.events:
+      if event["event"] == "test" and event["run"] == run_id:
+        tests[event["test"]] = event
+    return tests
+
+
+
+  def completed_tests(self) -> set[str]:
+    """
+    Returns the identifiers of all tests that have finished as part of the latest run.
+    """
+    run_id = self.latest_run()
+    if run_id is None:
+      return set()
+    return set(self.tests_in_run(run_id).keys())
+
+
+
+  def failed_tests(self) -> list[str]:
+    """
+    Returns the identifiers of all tests that errored or timed out or whose results could
+    not be submitted as part of the latest run. The tests are returned in the order in
+    which they were run.
+    """
+    run_id = self.latest_run()
+    if run_id is None:
+      return []
+    return [
+      test for test, event in self.tests_in_run(run_id).items()
+        if event["status"] in Failed_Status or event["submission"] == "failed"
+    ]
+
+
+
+  def selected_tests(self) -> list[str]:
+    """
+    Returns the identifiers of the tests that were selected to be run when the latest run
+    was started, or None if the journal does not contain a run or the run did not record
+    its selection.
+    """
+    run_id = self.latest_run()
+    for event in self.events:
+      if event["event"] == "run" and event["id"] == run_id and "tests" in event:
+        return event["tests"]
+    return None
+
+
+
+  def start_run(self, tests: list[str], resume=False):
+    """
+    Starts a new run of the `tests` that all subsequently recorded tests belong to. If
+    `resume` is True and the journal already contains a run, the latest run is continued
+    instead and it keeps the tests that were selected when it was started.
+    """
+    previous = self.latest_run()
+    if resume and previous is not None:
+      self.run_id = previous
+      tests = self.selected_tests() or tests
+    else:
+      self.run_id = uuid.uuid4().hex
+
+    self._append({
+      "event": "run",
+      "id": self.run_id,
+      "resume": resume and previous is not None,
+      "tests": tests,
+      "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat()
+    })
+
+
+
+  def record(self, test: str, status: str, timestamp: str, timing=None, commit=None,
+             images=None, submission="none", error=None, settle=None, tier="release",
+             pixel_error=None):
+    """
+    Records the result of the test `test` as part of the current run. The event is
+    written to disk before this function returns.
+    """
+    assert self.run_id is not None, "A run has to be started before recording tests"
+    self._append({
+      "event": "test",
+      "run": self.run_id,
+      "test": test,
+      "status": status,
+      "timestamp": timestamp,
+      "timing": timing,
+      "commit": commit,
+      "images": images if images is not None else [],
+      "submission": submission,
+      "error": error,
+      "settle": settle,
+      "tier": tier,
+      "pixelError": pixel_error
+    })
+
+
+
+  def _append(self, event):
+    self.events.append(event)
+    with open(self.path, "a") as f:
+      if self.needs_newline:
+        f.write("\n")
+        self.needs_newline = False
+      f.write(json.dumps(event) + "\n")
+      f.flush()
+      os.fsync(f.fileno())
@@ -25,9 +25,10 @@
 import asyncio
 import glob
 import os
-import subprocess
 import time
 from openspace import Api
+from .instruction import SettleOptions
+from .snapshot import StateSnapshot
 from .test import Test, TestResult
 
 
@@ -87,7 +88,8 @@ async def setup_test_run(openspace):
 
 
 
-async def internal_run(openspace, test, shutdown=True):
+async def internal_run(openspace, test, shutdown=True, settle: SettleOptions = None,
+                       restore=False):
   """
   This function runs the actual test with the library object passed into it. It first sets
   up default values, then runs the individual instructions for the test, and retrieves
@@ -96,12 +98,23 @@ async def internal_run(openspace, test, shutdown=True):
   This function assumes that the `openspace` library object is already authenticated and
   connected to the OpenSpace instance and is ready to take commands.
 
-  If `shutdown` is False, the OpenSpace instance will not be shut down after the test.
+  If `shutdown` is False, the OpenSpace instance will not be shut down after the test. If
+  `settle` is provided, the screenshot is taken once the rendering has converged. If
+  `restore` is True, the state that the test changes is captured before the test and
+  restored afterwards.
   """
-  print("  Starting test")
-  await setup_test_run(openspace)
-  await test.run(openspace)
-  print("  Finished test")
+  snapshot = None
+  if restore:
+    snapshot = await StateSnapshot.capture(openspace, test)
+
+  try:
+    print("  Starting test")
+    await setup_test_run(openspace)
+    await test.run(openspace, settle)
+    print("  Finished test")
+  finally:
+    if snapshot is not None:
+      await snapshot.restore(openspace)
 
   # Get the location of the screenshot folder from OpenSpace. It should always be the
   # same but this is just to make sure it will work
@@ -118,133 +131,171 @@ async def internal_run(openspace, test, shutdown=True):
 
 
 
-def run_single_test(test_path, executable) -> TestResult:
+async def launch_openspace(executable, profile, window_config):
   """
-  Run the single test provided by `test_path` using the OpenSpace executable provided by
-  `executable`. This will include starting OpenSpace as a subprocess using a known
-  configuration file and the profile required by the profile, establishing a connection
-  using the Python API to the OpenSpace instance, running the test's instructions and
-  returning the results.
+  Starts OpenSpace as a subprocess using the `executable` with the SGCT configuration file
+  `window_config` and the provided `profile`. This function returns the process and a task
+  that collects everything that OpenSpace writes to its error stream. The error stream is
+  read while OpenSpace is running so that OpenSpace does not stall on a full pipe.
+  """
+  process = await asyncio.create_subprocess_exec(
+    os.path.abspath(executable),
+    "--config", window_config,
+    "--profile", profile,
+    "--bypassLauncher",
+    cwd=os.path.dirname(os.path.abspath(executable)),
+    stdout=asyncio.subprocess.DEVNULL,
+    stderr=asyncio.subprocess.PIPE
+  )
+  stderr_task = asyncio.create_task(process.stderr.read())
+  return process, stderr_task
 
-   - `test_path`: The path to the ostest file that should be run. This file must exist
-   - `executable`: The path to the OpenSpace executable that should be run for the tests
+
+
+async def wait_for_port_release(port, timeout=30.0):
   """
-  print(f"Running test: {test_path}")
-  test = Test(test_path)
+  Waits until the `port` on the local machine no longer accepts connections, for example
+  because the OpenSpace instance that used it has finished shutting down. A TimeoutError
+  is raised if the port is still in use after `timeout` seconds.
+  """
+  start = time.perf_counter()
+  while time.perf_counter() - start < timeout:
+    try:
+      _, writer = await asyncio.open_connection("localhost", port)
+    except OSError:
+      return
+    writer.close()
+    await writer.wait_closed()
+    await asyncio.sleep(0.1)
+  raise TimeoutError(f"Port {port} was not released within {timeout} s")
 
-  # Skip the test if the test-creator asked for it
-  if test.skipTest:
-    print(f"  Skipping test {test_path}")
-    return None
 
-  start_time = time.perf_counter()
-  print(f"  Starting OpenSpace (Profile: {test.profile})")
-  process = subprocess.Popen(
-    [
-      os.path.abspath(executable),
-      "--config", f"{os.getcwd()}/1920-1080.json",
-      "--profile", test.profile,
-      "--bypassLauncher"
-    ],
-    cwd=os.path.dirname(os.path.abspath(executable)),
-    stdout=subprocess.DEVNULL,
-    stderr=subprocess.PIPE
-  )
 
-  # Add a sleeping time instead of repeatedly trying to reconnect. Starting up OpenSpace
-  # in general takes longer than this, so we don't actually lose any time
-  time.sleep(15)
-
-  async def mainLoop():
-    """
-    The main loop of an async event loop that is needed for the OpenSpace Python API to
-    work correctly. This will connect to OpenSpace, which then triggers the rest of the
-    test run
-    """
-    print("  Connecting...")
-    os_api = Api("localhost", 4681)
-    os_api.connect()
+async def connect_and_run(test, shutdown=True, settle: SettleOptions = None,
+                          restore=False, timeout=None):
+  """
+  Connects to the running OpenSpace instance, runs the `test`, and disconnects again.
+  This function returns the location of the screenshot folder and the commit hash of the
+  OpenSpace instance. If the test has not finished after `timeout` seconds, it is
+  canceled and a TimeoutError is raised. See `internal_run` for the `shutdown`, `settle`,
+  and `restore` parameters.
+  """
+  print("  Connecting...")
+  os_api = Api("localhost", 4681)
+  os_api.connect()
+
+  async def run():
     openspace = await os_api.singleReturnLibrary()
     # Injecting the main API into the library as we use it in some test instructions
     openspace.__api__ = os_api
     print("  Connected to OpenSpace")
-    screenshot_folder, commit = await asyncio.create_task(internal_run(openspace, test))
+    return await internal_run(
+      openspace,
+      test,
+      shutdown=shutdown,
+      settle=settle,
+      restore=restore
+    )
+
+  task = asyncio.create_task(run())
+  try:
+    done, _ = await asyncio.wait([ task ], timeout=timeout)
+    if task not in done:
+      task.cancel()
+      raise TimeoutError(f"The test did not finish within {timeout} s")
+    return task.result()
+  finally:
     os_api.disconnect()
-    return screenshot_folder, commit
 
-  screenshot_folder, commit = asyncio.new_event_loop().run_until_complete(mainLoop())
 
 
-  # Another wait while OpenSpace is shutting down
-  time.sleep(5)
+async def stop_openspace(process, stderr_task, timeout=5.0) -> str:
+  """
+  Waits for at most `timeout` seconds for the OpenSpace `process` to shut down and kills
+  it if it has not shut down by then. This function returns the contents of the error
+  stream that was collected by the `stderr_task`.
+  """
+  try:
+    await asyncio.wait_for(process.wait(), timeout)
+  except asyncio.TimeoutError:
+    # Kill the OpenSpace subprocess
+    process.kill()
+    await process.wait()
 
   # Get the error log from the OpenSpace subprocess
-  error_log = process.stderr.read().decode()
+  return (await stderr_task).decode()
+
 
-  # Kill the OpenSpace subprocess
-  process.kill()
-  end_time = time.perf_counter()
 
-  # Collect all screenshots taken by the test
+def collect_result(test, screenshot_folder, commit, timing, error_log,
+                   since=None) -> TestResult:
+  """
+  Creates the `TestResult` for the `test` from the information that was gathered while
+  running it and collects all of the screenshots that were taken by the test. If `since`
+  is provided, only screenshots that were written after that point in time are collected,
+  which is needed if the screenshot folder is shared between multiple tests.
+  """
   files = glob.glob(f"{screenshot_folder}/*.png")
+  if since is not None:
+    files = [ file for file in files if os.path.getmtime(file) >= since ]
   print(f"Test images: {files}")
 
   result = TestResult()
   result.group = test.group
   result.name = test.name
   result.files = files
-  result.timing = end_time - start_time
+  result.timing = timing
   result.commit = commit
   result.error = error_log
+  result.settle = test.settle
   return result
 
 
 
-def run_single_test_attached(test_path) -> TestResult:
+def run_single_test_attached(test_path, settle: SettleOptions = None,
+                             restore=True, timeout=None) -> TestResult:
   """
   Run the single test provided by `test_path` against an already-running OpenSpace
-  instance. Unlike `run_single_test`, this function does not start or stop OpenSpace —
+  instance. Unlike the `Orchestrator`, this function does not start or stop OpenSpace —
   it only connects to the running instance, executes the test, and then disconnects.
 
    - `test_path`: The path to the ostest file that should be run. This file must exist
+   - `settle`: If provided, the screenshot is taken once the rendering has converged
+               instead of after a fixed wait time
+   - `restore`: If True, the state that the test changes in the OpenSpace instance is
+                restored after the test, so that multiple tests can be run one after
+                another against the same instance
+   - `timeout`: The number of seconds after which the test is canceled and a
+                TimeoutError is raised. If it is not provided, the test can run for any
+                amount of time
   """
   print(f"Running test (attached): {test_path}")
   test = Test(test_path)
 
-  start_time = time.perf_counter()
+  # Skip the test if the test-creator asked for it
+  if test.skipTest:
+    print(f"  Skipping test {test_path}")
+    return None
 
-  async def mainLoop():
-    """
-    The main loop of an async event loop that is needed for the OpenSpace Python API to
-    work correctly. This will connect to OpenSpace, which then triggers the rest of the
-    test run
-    """
-    print("  Connecting...")
-    os_api = Api("localhost", 4681)
-    os_api.connect()
-    openspace = await os_api.singleReturnLibrary()
-    # Injecting the main API into the library as we use it in some test instructions
-    openspace.__api__ = os_api
-    print("  Connected to OpenSpace")
-    screenshot_folder, commit = await asyncio.create_task(
-      internal_run(openspace, test, shutdown=False)
+  start_time = time.perf_counter()
+  # The screenshot folder is shared between all tests that run against this instance
+  since = time.time()
+  screenshot_folder, commit = asyncio.run(
+    connect_and_run(
+      test,
+      shutdown=False,
+      settle=settle,
+      restore=restore,
+      timeout=timeout
     )
-    os_api.disconnect()
-    return screenshot_folder, commit
-
-  screenshot_folder, commit = asyncio.new_event_loop().run_until_complete(mainLoop())
-
+  )
   end_time = time.perf_counter()
 
-  # Collect all screenshots taken by the test
-  files = glob.glob(f"{screenshot_folder}/*.png")
-  print(f"Test images: {files}")
-
-  result = TestResult()
-  result.group = test.group
-  result.name = test.name
-  result.files = files
-  result.timing = end_time - start_time
-  result.commit = commit
-  result.error = ""
-  return result
+  return collect_result(
+    test,
+    screenshot_folder,
+    commit,
+    end_time - start_time,
+    "",
+    since=since
+  )
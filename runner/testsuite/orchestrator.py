@@ -0,0 +1,230 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import asyncio
+import datetime
+import time
+from .instruction import SettleOptions
+from .openspace import launch_openspace, connect_and_run, stop_openspace, collect_result
+from .openspace import wait_for_port_release
+from .test import Test
+
+
+
+# The policies that determine when the next OpenSpace instance is started:
+#   - `none`: Only after the previous test has been completely finished, including the
+#             submission of its results
+#   - `upload`: As soon as the previous OpenSpace instance has exited. The results of the
+#               previous test are submitted while the next instance is starting up
+#   - `teardown`: As soon as the previous test has asked OpenSpace to shut down. The
+#                 previous instance is shutting down while the next one is starting up,
+#                 but the next instance is only launched once the previous one has
+#                 released the server port
+Overlap_Policies = [ "none", "upload", "teardown" ]
+
+
+
+class Stage:
+  """
+  Keeps track of the progress of a single test through the orchestrator. Each of the
+  events is set once the test has reached the corresponding point, or if the test failed
+  before it could reach it. `launched` is True if an OpenSpace instance was started for
+  the test, which is not the case if the test was skipped or failed before that.
+  """
+  def __init__(self, path: str):
+    self.path = path
+    self.launched = False
+    self.released = asyncio.Event()
+    self.exited = asyncio.Event()
+    self.done = asyncio.Event()
+    self.timings = {}
+
+  def finish(self):
+    """
+    Marks this test as completely finished.
+    """
+    self.released.set()
+    self.exited.set()
+    self.done.set()
+
+
+
+class Orchestrator:
+  """
+  Runs a list of tests in a single, long-lived event loop in which the stages of
+  consecutive tests overlap. Each test goes through the stages `startup` (launching
+  OpenSpace and waiting for it to start), `run` (running the test's instructions),
+  `teardown` (waiting for OpenSpace to exit and collecting the error log), and `report`
+  (passing the result to the `on_result` callback, which, for example, submits the
+  images). When the next test can be started is determined by the `overlap` policy (see
+  `Overlap_Policies`), after which an explicit `cooldown` in seconds is waited if the
+  previous test started an OpenSpace instance.
+
+  The `on_result` callback is called with the test path, the timestamp at which the test
+  was started, the `TestResult` (or None if the test was skipped or failed), and the
+  exception that caused the test to fail (or None). The callback is run in a separate
+  thread, but only one callback runs at a time and they run in the order of the tests. If
+  the callback raises an exception, it is printed and the remaining tests continue.
+
+  OpenSpace is started with the SGCT configuration file `window_config`, which determines
+  the resolution at which the tests are rendered. If the `run` stage of a test takes
+  longer than `timeout` seconds, the test fails with a TimeoutError and its OpenSpace
+  instance is shut down.
+  """
+  def __init__(self, executable: str, window_config: str, on_result, overlap="upload",
+               cooldown=5.0, settle: SettleOptions = None, timeout=None):
+    if overlap not in Overlap_Policies:
+      raise Exception(f"Invalid overlap policy '{overlap}'")
+
+    self.executable = executable
+    self.window_config = window_config
+    self.on_result = on_result
+    self.overlap = overlap
+    self.cooldown = cooldown
+    self.settle = settle
+    self.timeout = timeout
+    self.stages = []
+
+
+
+  def run(self, paths: list[str]):
+    """
+    Runs all tests in `paths` and returns once all results have been reported.
+    """
+    asyncio.run(self._run(paths))
+
+
+
+  async def _run(self, paths: list[str]):
+    tasks = []
+    previous = None
+    for path in paths:
+      if previous is not None:
+        match self.overlap:
+          case "none":
+            await previous.done.wait()
+          case "upload":
+            await previous.exited.wait()
+          case "teardown":
+            await previous.released.wait()
+
+        # There is no instance to cool down from if the previous test was skipped
+        if previous.launched:
+          start = time.perf_counter()
+          await asyncio.sleep(self.cooldown)
+          previous.timings["cooldown"] = time.perf_counter() - start
+
+      stage = Stage(path)
+      self.stages.append(stage)
+      tasks.append(asyncio.create_task(self._execute(stage, previous)))
+      previous = stage
+
+    await asyncio.gather(*tasks)
+
+
+
+  async def _execute(self, stage: Stage, previous: Stage):
+    timestamp = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    result = None
+    error = None
+    try:
+      result = await self._run_test(stage)
+    except Exception as e:
+      error = e
+    finally:
+      stage.released.set()
+      stage.exited.set()
+
+    # Wait for the previous test to finish its report to keep the results in order. A
+    # skipped or failed test can get here before the previous test has finished
+    if previous is not None:
+      await previous.done.wait()
+
+    start = time.perf_counter()
+    try:
+      await asyncio.to_thread(self.on_result, stage.path, timestamp, result, error)
+    except Exception as e:
+      print(f"Reporting the result of test '{stage.path}' failed with error: {e}")
+    finally:
+      stage.timings["report"] = time.perf_counter() - start
+      stage.finish()
+
+
+
+  async def _run_test(self, stage: Stage):
+    print(f"Running test: {stage.path}")
+    test = Test(stage.path)
+
+    # Skip the test if the test-creator asked for it
+    if test.skipTest:
+      print(f"  Skipping test {stage.path}")
+      return None
+
+    if self.overlap == "teardown":
+      # The previous instance might still be shutting down and holding on to the port
+      await wait_for_port_release(4681)
+
+    start_time = time.perf_counter()
+    print(f"  Starting OpenSpace (Profile: {test.profile})")
+    process, stderr_task = await launch_openspace(
+      self.executable,
+      test.profile,
+      self.window_config
+    )
+    stage.launched = True
+    try:
+      # Add a sleeping time instead of repeatedly trying to reconnect. Starting up
+      # OpenSpace in general takes longer than this, so we don't actually lose any time
+      await asyncio.sleep(15)
+      stage.timings["startup"] = time.perf_counter() - start_time
+
+      start = time.perf_counter()
+      screenshot_folder, commit = await connect_and_run(
+        test,
+        settle=self.settle,
+        timeout=self.timeout
+      )
+      stage.timings["run"] = time.perf_counter() - start
+    finally:
+      stage.released.set()
+      start = time.perf_counter()
+      error_log = await stop_openspace(process, stderr_task)
+      stage.timings["teardown"] = time.perf_counter() - start
+    end_time = time.perf_counter()
+
+    return collect_result(test, screenshot_folder, commit, end_time - start_time, error_log)
+
+
+
+  def print_statistics(self):
+    """
+    Prints the total and average time that was spent in each of the stages.
+    """
+    print("Stage timings:")
+    for name in [ "startup", "run", "teardown", "report", "cooldown" ]:
+      timings = [ stage.timings[name] for stage in self.stages if name in stage.timings ]
+      if len(timings) == 0:
+        continue
+      total = sum(timings)
+      print(f"  {name}: {total:.2f} s total, {total / len(timings):.2f} s average")
@@ -0,0 +1,293 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import email.utils
+import datetime
+import random
+import requests
+import statistics
+import threading
+import time
+
+
+
+# The status codes with which a server signals that it is overloaded
+Throttle_Status = [ 429, 503 ]
+
+# The longest delay in seconds between two submissions if the server is overloaded
+Max_Delay = 60.0
+
+
+
+class SubmissionController:
+  """
+  Controls the rate at which results are submitted to a regression server. The number of
+  concurrent submissions is adjusted in an additive-increase/multiplicative-decrease
+  manner: every fast, successful submission slowly raises the limit up to
+  `max_concurrency`, while every slow submission (slower than `target_latency` seconds),
+  error, or throttling response halves it. Once only a single submission is made at a
+  time, each further sign of overload instead doubles a delay that is waited between the
+  submissions (starting at one second and up to `Max_Delay`), and each fast, successful
+  submission halves it again before the limit is raised. If the server responds with 429
+  or 503, no new submissions are started until the time in its `Retry-After` header has
+  passed. Submissions that the server did not process, as it either throttled them or
+  could not be reached at all, are retried up to `max_retries` times with a randomized
+  exponential backoff. Other failures are not retried, as the server might have stored
+  the result already and a retry would submit it a second time. Requests should use
+  `timeout` as their timeout, which is six times the `target_latency`, so that a hanging
+  request does not block the submissions forever.
+
+  To prevent multiple runners that finish at the same time from overloading the server
+  together, the first submission is delayed by a random time of up to `spread` seconds
+  after it was requested and every submission by a random time of up to `jitter` seconds.
+  """
+  def __init__(self, max_concurrency=1, target_latency=10.0, max_retries=5, spread=0.0,
+               jitter=0.0):
+    self.max_concurrency = max_concurrency
+    self.target_latency = target_latency
+    self.max_retries = max_retries
+    self.spread = spread
+    self.jitter = jitter
+    self.timeout = 6.0 * target_latency
+
+    self.limit = 1.0
+    self.delay = 0.0
+    self.in_flight = 0
+    self.started = False
+    self.paused_until = time.monotonic()
+    self.condition = threading.Condition()
+
+    self.latencies = []
+    self.counts = {
+      "submissions": 0,
+      "successes": 0,
+      "failures": 0,
+      "retries": 0,
+      "throttled": 0,
+      "errors": 0
+    }
+    self.lowest_limit = self.limit
+    self.highest_limit = self.limit
+    self.highest_delay = self.delay
+
+
+
+  def request(self, send):
+    """
+    Performs a submission using the callable `send`, which must make the request and
+    return its `requests.Response`. As the request might be retried, `send` has to be
+    callable multiple times. This function returns the final response, or raises the
+    exception if the request failed without a response.
+    """
+    with self.condition:
+      self.counts["submissions"] += 1
+
+    for attempt in range(self.max_retries + 1):
+      if attempt > 0:
+        with self.condition:
+          self.counts["retries"] += 1
+        # Randomized exponential backoff
+        time.sleep(random.uniform(0.0, min(2.0 ** attempt, 60.0)))
+
+      self._acquire()
+      start = time.monotonic()
+      res = None
+      try:
+        res = send()
+      except requests.ConnectionError as e:
+        # The request did not reach the server, so it can safely be made again
+        error = e
+        print(f"Submission attempt {attempt + 1} failed with error {e}")
+        continue
+      except requests.RequestException:
+        # The server might have processed the request even if there was no response, for
+        # example after a timeout, so it is not made again to avoid duplicate results
+        with self.condition:
+          self.counts["failures"] += 1
+        raise
+      finally:
+        # Any other exception is raised to the caller, but the slot has to be released
+        self._release(res, time.monotonic() - start)
+
+      if res.status_code in Throttle_Status:
+        print(f"Submission attempt {attempt + 1} failed with error {res.status_code}")
+        error = None
+        continue
+
+      with self.condition:
+        self.counts["successes" if res.status_code == 200 else "failures"] += 1
+      return res
+
+    with self.condition:
+      self.counts["failures"] += 1
+    if error is not None:
+      raise error
+    return res
+
+
+
+  def statistics(self) -> dict:
+    """
+    Returns statistics about all submissions that were made through this controller.
+    """
+    with self.condition:
+      stats = dict(self.counts)
+      stats["concurrency"] = {
+        "final": self.limit,
+        "lowest": self.lowest_limit,
+        "highest": self.highest_limit
+      }
+      stats["delay"] = {
+        "final": self.delay,
+        "highest": self.highest_delay
+      }
+      if len(self.latencies) > 0:
+        latencies = sorted(self.latencies)
+        stats["latency"] = {
+          "mean": statistics.mean(latencies),
+          "median": statistics.median(latencies),
+          "p95": latencies[min(int(0.95 * len(latencies)), len(latencies) - 1)],
+          "max": latencies[-1]
+        }
+      return stats
+
+
+
+  def print_statistics(self):
+    """
+    Prints a summary of the statistics of all submissions.
+    """
+    stats = self.statistics()
+    print("Submission statistics:")
+    print(
+      f"  {stats['submissions']} submissions, {stats['successes']} succeeded, "
+      f"{stats['failures']} failed, {stats['retries']} retries, "
+      f"{stats['throttled']} throttled"
+    )
+    if "latency" in stats:
+      latency = stats["latency"]
+      print(
+        f"  Latency: median {latency['median']:.2f} s, p95 {latency['p95']:.2f} s, "
+        f"max {latency['max']:.2f} s"
+      )
+    concurrency = stats["concurrency"]
+    print(
+      f"  Concurrency: final {concurrency['final']:.2f}, lowest "
+      f"{concurrency['lowest']:.2f}, highest {concurrency['highest']:.2f}"
+    )
+    delay = stats["delay"]
+    if delay["highest"] > 0.0:
+      print(
+        f"  Delay between submissions: final {delay['final']:.2f} s, highest "
+        f"{delay['highest']:.2f} s"
+      )
+
+
+
+  def _acquire(self):
+    if self.jitter > 0.0:
+      time.sleep(random.uniform(0.0, self.jitter))
+
+    with self.condition:
+      if not self.started:
+        # The spread starts with the first submission rather than with the run
+        self.started = True
+        spread = random.uniform(0.0, self.spread)
+        self.paused_until = max(self.paused_until, time.monotonic() + spread)
+
+      while True:
+        wait = self.paused_until - time.monotonic()
+        if wait <= 0.0 and self.in_flight < int(self.limit):
+          break
+        self.condition.wait(timeout=wait if wait > 0.0 else None)
+      self.in_flight += 1
+
+
+
+  def _release(self, res, latency):
+    with self.condition:
+      self.in_flight -= 1
+
+      if res is None:
+        # The request could not be made at all, for example because of a timeout
+        self.counts["errors"] += 1
+        self._decrease()
+      else:
+        self.latencies.append(latency)
+        if res.status_code in Throttle_Status:
+          self.counts["throttled"] += 1
+          self._decrease()
+          retry_after = parse_retry_after(res.headers.get("Retry-After"))
+          if retry_after is not None:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        elif res.status_code >= 500 or latency > self.target_latency:
+          self._decrease()
+        elif self.delay > 0.0:
+          # Remove the delay between submissions before raising the limit again
+          self.delay = self.delay / 2.0 if self.delay > 1.0 else 0.0
+        else:
+          # Additive increase of one additional submission per full window
+          self.limit = min(self.limit + 1.0 / self.limit, float(self.max_concurrency))
+          self.highest_limit = max(self.highest_limit, self.limit)
+
+      if self.delay > 0.0:
+        self.paused_until = max(self.paused_until, time.monotonic() + self.delay)
+      self.condition.notify_all()
+
+
+
+  def _decrease(self):
+    if self.limit <= 1.0:
+      # The limit can not be lowered any further, so give the server more time between
+      # the submissions instead
+      self.delay = min(max(2.0 * self.delay, 1.0), Max_Delay)
+      self.highest_delay = max(self.highest_delay, self.delay)
+    self.limit = max(self.limit / 2.0, 1.0)
+    self.lowest_limit = min(self.lowest_limit, self.limit)
+
+
+
+def parse_retry_after(value) -> float:
+  """
+  Returns the number of seconds that a `Retry-After` header `value` asks to wait, which
+  can either be provided as a number of seconds or as a date. Returns None if the value
+  is missing or invalid.
+  """
+  if value is None:
+    return None
+
+  try:
+    return max(float(value), 0.0)
+  except ValueError:
+    pass
+
+  try:
+    date = email.utils.parsedate_to_datetime(value)
+  except (TypeError, ValueError):
+    return None
+  if date.tzinfo is None:
+    # Dates with a `-0000` offset do not have a time zone, but they are in UTC
+    date = date.replace(tzinfo=datetime.timezone.utc)
+  now = datetime.datetime.now(datetime.timezone.utc)
+  return max((date - now).total_seconds(), 0.0)
@@ -0,0 +1,197 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import datetime
+import hashlib
+import json
+import requests
+import statistics
+from .journal import Journal
+from .test import Test, group_and_name, test_identifier
+
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+  """
+  Parses a shard specification of the form `i/N`, where `i` is the 1-based index of the
+  shard and `N` is the total number of shards.
+  """
+  try:
+    index, count = [ int(v) for v in value.split("/") ]
+  except ValueError:
+    raise Exception(f"Invalid shard '{value}', expected the form 'i/N'")
+  if count < 1 or index < 1 or index > count:
+    raise Exception(f"Invalid shard '{value}', the index must be between 1 and {count}")
+  return index, count
+
+
+
+def parse_cutoff(value: str) -> datetime.datetime:
+  """
+  Parses the point in time `value` in ISO 8601 format after which recorded durations are
+  ignored, or returns None if no `value` is provided.
+  """
+  if value is None:
+    return None
+  return parse_timestamp(value)
+
+
+
+def parse_timestamp(value: str) -> datetime.datetime:
+  """
+  Parses the timestamp `value` in ISO 8601 format, which is assumed to be in UTC if it
+  does not contain a time zone.
+  """
+  date = datetime.datetime.fromisoformat(value)
+  if date.tzinfo is None:
+    date = date.replace(tzinfo=datetime.timezone.utc)
+  return date
+
+
+
+def server_durations(url: str, hardware: str, cutoff: datetime.datetime = None) -> dict:
+  """
+  Returns the duration of the latest run of each test for the `hardware` as recorded on
+  the regression server at `url`. If a `cutoff` is provided, runs that happened at or
+  after that point in time are ignored. The keys of the returned dictionary are tuples of
+  the group and the name of the tests.
+  """
+  res = requests.get(f"{url}/api/test-records")
+  if res.status_code != 200:
+    raise Exception(f"Requesting test records failed with error {res.status_code}")
+
+  durations = {}
+  for record in res.json():
+    if record["hardware"] != hardware:
+      continue
+    runs = [
+      (parse_timestamp(data["timeStamp"]), data["timing"]) for data in record["data"]
+    ]
+    runs = [ run for run in runs if cutoff is None or run[0] < cutoff ]
+    if len(runs) > 0:
+      durations[(record["group"], record["name"])] = max(runs)[1]
+  return durations
+
+
+
+def journal_durations(journal: Journal, cutoff: datetime.datetime = None) -> dict:
+  """
+  Returns the duration of the latest successful release tier run of each test that is
+  recorded in the `journal`. If a `cutoff` is provided, runs that were started at or
+  after that point in time are ignored. The keys of the returned dictionary are tuples of
+  the group and the name of the tests.
+  """
+  durations = {}
+  for event in journal.events:
+    if event["event"] != "test" or event["status"] != "success":
+      continue
+    if event.get("tier", "release") != "release" or event["timing"] is None:
+      continue
+    if cutoff is not None and parse_timestamp(event["timestamp"]) >= cutoff:
+      continue
+    durations[group_and_name(event["test"])] = event["timing"]
+  return durations
+
+
+
+def read_durations(path: str) -> dict:
+  """
+  Reads the durations from the file at `path` that was written by `write_durations`. The
+  keys of the returned dictionary are tuples of the group and the name of the tests.
+  """
+  with open(path, "r") as f:
+    durations = json.load(f)
+  return { tuple(key.rsplit("/", 1)): timing for key, timing in durations.items() }
+
+
+
+def write_durations(path: str, durations: dict):
+  """
+  Writes the `durations` into the file at `path` so that the same durations can be used
+  by all machines that share the tests. The file contains a JSON object with the duration
+  in seconds of each test, whose keys are the group and the name joined by a `/`.
+  """
+  content = { f"{group}/{name}": timing for (group, name), timing in durations.items() }
+  with open(path, "w") as f:
+    json.dump(content, f, indent=2, sort_keys=True)
+
+
+
+def known_durations(paths: list[str], durations: dict) -> list[float]:
+  """
+  Returns the recorded durations of all tests at `paths` that have one in `durations`.
+  """
+  keys = [ group_and_name(test_identifier(path)) for path in paths ]
+  return [ durations[key] for key in keys if key in durations ]
+
+
+
+def partition(paths: list[str], count: int, durations: dict) -> list[list[str]]:
+  """
+  Deterministically partitions the tests at `paths` into `count` shards. Tests that use
+  the same profile are always placed on the same shard. The shards are balanced by the
+  expected duration of the tests, which is taken from `durations`. Tests without a
+  recorded duration are assumed to take the median duration of all other tests. If no
+  test has a recorded duration, the profiles are distributed by their hash instead.
+  """
+  # Group the tests by their profile. Tests that can not be loaded are kept on their own
+  units = {}
+  for path in sorted(paths):
+    try:
+      key = Test(path).profile
+    except Exception:
+      key = path
+    units.setdefault(key, []).append(path)
+
+  shards = [ [] for _ in range(count) ]
+  known = known_durations(paths, durations)
+  if len(known) == 0:
+    for key, unit in units.items():
+      index = int(hashlib.sha256(key.encode()).hexdigest(), 16) % count
+      shards[index].extend(unit)
+    return shards
+
+  default = statistics.median(known)
+  expected = {
+    key: expected_duration(unit, durations, default) for key, unit in units.items()
+  }
+
+  # Assign the longest units first, each to the shard with the least expected time
+  loads = [ 0.0 ] * count
+  for key in sorted(units.keys(), key=lambda key: (-expected[key], key)):
+    index = loads.index(min(loads))
+    shards[index].extend(units[key])
+    loads[index] = loads[index] + expected[key]
+  return shards
+
+
+
+def expected_duration(paths: list[str], durations: dict, default: float) -> float:
+  """
+  Returns the expected duration of running all tests at `paths`, where tests without a
+  recorded duration in `durations` are assumed to take `default` seconds.
+  """
+  return sum(
+    durations.get(group_and_name(test_identifier(path)), default) for path in paths
+  )
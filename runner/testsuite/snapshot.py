@@ -0,0 +1,147 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+
+# The properties that are changed by `setup_test_run` for every test
+Setup_Properties = [
+  "Dashboard.IsEnabled",
+  "RenderEngine.ShowLog",
+  "RenderEngine.ShowVersion",
+  "RenderEngine.ShowCamera"
+]
+
+
+
+class StateSnapshot:
+  """
+  Captures the parts of the state of a running OpenSpace instance that a test can change,
+  so that the state can be restored after the test has finished. This makes it possible
+  to run many tests back to back against the same OpenSpace instance. The snapshot
+  contains:
+    - `navigation`: The navigation state of the camera
+    - `time`: The simulation time
+    - `deltatime`: The simulation delta time
+    - `paused`: Whether the simulation time is paused
+    - `properties`: The values of all properties that the test sets which already exist
+    - `assets`: The assets that are added by the test which were not loaded before
+
+  Changes made by `action` and `script` instructions, as well as properties that are set
+  through a wildcard or a tag, are not captured.
+  """
+  def __init__(self):
+    self.navigation = None
+    self.time = None
+    self.deltatime = None
+    self.paused = None
+    self.properties = {}
+    self.assets = []
+    self.playback = False
+
+
+
+  @staticmethod
+  async def capture(openspace, test):
+    """
+    Captures the current state of the OpenSpace instance `openspace` for the properties
+    and assets that the `test` will touch.
+    """
+    snapshot = StateSnapshot()
+    snapshot.navigation = await openspace.navigation.getNavigationState()
+    snapshot.time = await openspace.time.currentTimeUTC()
+    snapshot.deltatime = await openspace.time.deltaTime()
+    snapshot.paused = await openspace.time.isPaused()
+
+    properties = list(Setup_Properties)
+    for instruction in test.instructions:
+      match instruction.type:
+        case "property":
+          uri = instruction.value["property"]
+          # Properties that are set through a wildcard or a tag match an unknown number of
+          # properties and can not be captured
+          if "*" in uri or "{" in uri:
+            print(f"  Property '{uri}' can not be captured and will not be restored")
+          elif uri not in properties:
+            properties.append(uri)
+        case "asset":
+          if not await openspace.asset.isLoaded(instruction.value):
+            snapshot.assets.append(instruction.value)
+        case "recording":
+          snapshot.playback = True
+        case "action" | "script":
+          # Actions and scripts can change arbitrary parts of the state
+          print(
+            f"  Changes by the {instruction.type} '{instruction.value}' can not be "
+            "captured and will not be restored"
+          )
+
+    for uri in properties:
+      # Properties of assets that the test adds itself do not exist yet and are removed
+      # together with the asset
+      if await openspace.hasProperty(uri):
+        snapshot.properties[uri] = await openspace.propertyValue(uri)
+
+    return snapshot
+
+
+
+  async def restore(self, openspace):
+    """
+    Restores the state of the OpenSpace instance `openspace` to this snapshot. A part of
+    the state that can not be restored is reported and the remaining parts are still
+    restored.
+    """
+    print("  Restoring state")
+
+    async def restore_part(description, function, *arguments):
+      try:
+        await function(*arguments)
+      except Exception as e:
+        print(f"  Restoring {description} failed with error: {e}")
+
+    async def stop_playback():
+      if await openspace.sessionRecording.isPlayingBack():
+        await openspace.sessionRecording.stopPlayback()
+
+    if self.playback:
+      await restore_part("the recording", stop_playback)
+
+    for asset in reversed(self.assets):
+      await restore_part(f"asset '{asset}'", openspace.asset.remove, asset)
+
+    for uri, value in self.properties.items():
+      await restore_part(
+        f"property '{uri}'",
+        openspace.setPropertyValueSingle,
+        uri,
+        value
+      )
+
+    await restore_part("the pause state", openspace.time.setPause, self.paused)
+    await restore_part("the time", openspace.time.setTime, self.time)
+    await restore_part("the delta time", openspace.time.setDeltaTime, self.deltatime)
+    await restore_part(
+      "the navigation state",
+      openspace.navigation.setNavigationState,
+      self.navigation
+    )
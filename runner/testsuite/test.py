@@ -26,9 +26,33 @@ import asyncio
 import json
 import os
 import time
-from .instruction import Instruction
+from .instruction import Instruction, SettleOptions
 from .constants import test_base_dir
 
+
+
+def test_identifier(path: str) -> str:
+  """
+  Returns the identifier of the test at `path`, which is the path relative to the base
+  visual testing folder without the file extension. This is the same form that is used for
+  the `--test` commandline argument, for example `default/earth`.
+  """
+  path = path.replace(os.sep, "/")
+  start_idx = path.find(test_base_dir) + len(test_base_dir) + 1
+  return path[start_idx:-len(".ostest")]
+
+
+
+def group_and_name(identifier: str) -> tuple[str, str]:
+  """
+  Returns the group and the name of the test with the provided `identifier`. The last part
+  of the identifier is the name of the test, all others are combined to make the grouping.
+  """
+  parts = identifier.split("/")
+  return "-".join(parts[0:-1]), parts[-1]
+
+
+
 class TestResult:
   """
   Stores the result of a single test run. It has the following members:
@@ -39,6 +63,8 @@ class TestResult:
     - `timing`: The number of seconds it took to execute the test
     - `commit`: The commit hash for OpenSpace that was used to run the test
     - `error`: The contents of the error stream that was captured during the test run
+    - `settle`: If the screenshot was taken in settle mode, the number of probe `frames`,
+                the `time` it took to converge, and whether it `converged`. None otherwise
   """
   group: str
   name: str
@@ -46,6 +72,7 @@ class TestResult:
   timing: float
   commit: str
   error: str
+  settle: dict = None
 
 class Test:
   """
@@ -69,6 +96,7 @@ class Test:
       raise Exception(f"Missing 'commands' in test {path}")
 
     self.skipTest = content.get("skip_test", False)
+    self.settle = None
 
     self.instructions = []
     for command in content["commands"]:
@@ -90,20 +118,19 @@ class Test:
 
     # Get the testname by removing everything before (and including) "test/visual" and
     # also removing the extension
-    start_idx = self.test_path.find(test_base_dir) + len(test_base_dir) + 1
-    full = self.test_path[start_idx:-len(".ostest")]
-    parts = full.split("/")
-
-    # The last part is the name of test, all others are combined to make the grouping
-    self.group = "-".join(parts[0:-1])
-    self.name = parts[-1]
+    self.identifier = test_identifier(self.test_path)
+    self.group, self.name = group_and_name(self.identifier)
 
 
-  async def run(self, openspace):
+  async def run(self, openspace, settle: SettleOptions = None):
     """
     Runs the actual instructions on the provided OpenSpace API instance. There is a
-    mandatory 1s wait time between every instructions
+    mandatory 1s wait time between every instructions. If `settle` is provided, the
+    screenshot is taken once the rendering has converged and the convergence information
+    is stored in `settle` of this test
     """
     for instruction in self.instructions:
-      await instruction.run(openspace)
+      settle_result = await instruction.run(openspace, settle)
+      if settle_result is not None:
+        self.settle = settle_result
       await asyncio.sleep(1.0)
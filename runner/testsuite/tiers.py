@@ -0,0 +1,87 @@
+##########################################################################################
+#                                                                                        #
+# OpenSpace Visual Testing                                                               #
+#                                                                                        #
+# Copyright (c) 2024-2026                                                                #
+#                                                                                        #
+# Permission is hereby granted, free of charge, to any person obtaining a copy of this   #
+# software and associated documentation files (the "Software"), to deal in the Software  #
+# without restriction, including without limitation the rights to use, copy, modify,     #
+# merge, publish, distribute, sublicense, and/or sell copies of the Software, and to     #
+# permit persons to whom the Software is furnished to do so, subject to the following    #
+# conditions:                                                                            #
+#                                                                                        #
+# The above copyright notice and this permission notice shall be included in all copies  #
+# or substantial portions of the Software.                                               #
+#                                                                                        #
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED,    #
+# INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A          #
+# PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT     #
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF   #
+# CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE   #
+# OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.                                          #
+##########################################################################################
+
+import json
+import os
+
+
+
+# The resolutions at which tests can be rendered. The `release` tier is the full
+# resolution that is used for the regular test runs, the `smoke` tier renders at a quarter
+# of the pixels to make it possible to run the tests more often
+Tiers = {
+  "smoke": (960, 540),
+  "release": (1920, 1080)
+}
+
+# The window configuration file for the release tier which is used as a template for all
+# other tiers
+Release_Configuration = "1920-1080.json"
+
+
+
+def hardware_for_tier(hardware: str, tier: str) -> str:
+  """
+  Returns the hardware string under which the results of the `tier` are submitted. The
+  results of the release tier are submitted under the plain `hardware` so that the
+  existing references are used, all other tiers add their name as a suffix to keep their
+  references separate.
+  """
+  if tier == "release":
+    return hardware
+  return f"{hardware}-{tier}"
+
+
+
+def window_configuration(tier: str) -> str:
+  """
+  Returns the absolute path to the SGCT window configuration file that renders at the
+  resolution of the `tier`. The configuration files for tiers other than the release
+  tier are generated from the release configuration in the `generated` folder.
+  """
+  if tier not in Tiers:
+    raise Exception(f"Unknown tier '{tier}'")
+
+  template = f"{os.getcwd()}/{Release_Configuration}"
+  if tier == "release":
+    return template
+
+  width, height = Tiers[tier]
+  with open(template) as f:
+    config = json.load(f)
+
+  for node in config["nodes"]:
+    for window in node["windows"]:
+      window["res"] = { "x": width, "y": height }
+      # The window itself must not be larger than the rendering resolution
+      window["size"] = {
+        "x": min(window["size"]["x"], width),
+        "y": min(window["size"]["y"], height)
+      }
+
+  os.makedirs(f"{os.getcwd()}/generated", exist_ok=True)
+  path = f"{os.getcwd()}/generated/{width}-{height}.json"
+  with open(path, "w") as f:
+    json.dump(config, f, indent=2)
+  return path